@@ -0,0 +1,107 @@
+"""
+Compare VCS backends answering read-only queries about local repositories.
+
+Each round queries status, tracked files and refs of every repository, from a pool of job
+threads, like Sebex commands do. By default, a synthetic workspace is generated in a temporary
+directory, an existing one may be given instead:
+
+    python -m benchmarks.vcs_backends --repos 150 --jobs 32
+    python -m benchmarks.vcs_backends --workspace ~/membrane
+"""
+
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+import click
+
+from sebex.context import Context
+from sebex.log import table
+from sebex.vcs_backend import all_backends, VcsBackend
+
+
+def _generate_workspace(path: Path, repos: int, files: int) -> List[Path]:
+    locations = []
+    for i in range(repos):
+        location = path / f'repo_{i}'
+        (location / 'lib').mkdir(parents=True)
+        for j in range(files):
+            (location / 'lib' / f'file_{j}.ex').write_text(f'defmodule M{j} do\nend\n')
+
+        def git(*args):
+            subprocess.run(['git', '-C', str(location), *args], check=True,
+                           stdout=subprocess.DEVNULL)
+
+        git('init', '-q', '-b', 'master')
+        git('add', '.')
+        git('-c', 'user.name=Sebex', '-c', 'user.email=sebex@example.com',
+            'commit', '-q', '-m', 'initial')
+        for k in range(20):
+            git('tag', f'v0.{k}.0')
+
+        locations.append(location)
+
+    return locations
+
+
+def _query(context: Context, backend_class, location: Path):
+    # Like in Sebex jobs, each thread runs within the context of the command.
+    with Context.activate(context):
+        backend: VcsBackend = backend_class(location)
+        backend.status()
+        backend.tracked()
+        backend.refs()
+
+
+def _measure(backend_class, locations: List[Path], jobs: int, rounds: int) -> float:
+    context = Context.current()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for _ in range(rounds):
+            list(executor.map(lambda location: _query(context, backend_class, location),
+                              locations))
+
+    return (time.perf_counter() - start) / rounds
+
+
+@click.command()
+@click.option('--workspace', type=click.Path(exists=True, file_okay=False),
+              help='Existing workspace to query, instead of a generated one.')
+@click.option('--repos', default=150, show_default=True, help='Repositories to generate.')
+@click.option('--files', default=200, show_default=True, help='Files in each generated one.')
+@click.option('--jobs', default=32, show_default=True, help='Number of job threads.')
+@click.option('--rounds', default=5, show_default=True, help='Number of measured rounds.')
+def main(workspace, repos: int, files: int, jobs: int, rounds: int):
+    with tempfile.TemporaryDirectory(prefix='sebex-benchmark-') as directory:
+        Context.initial(workspace=workspace or directory, profile='all',
+                        github_access_token=None, jobs=jobs, assumeyes=True)
+
+        if workspace is not None:
+            locations = [p for p in sorted(Path(workspace).iterdir()) if (p / '.git').exists()]
+        else:
+            click.echo(f'Generating {repos} repositories...')
+            locations = _generate_workspace(Path(directory), repos, files)
+
+        rows = []
+        for backend_class in all_backends():
+            try:
+                backend_class(locations[0])
+            except ImportError:
+                rows.append([backend_class.name(), 'not installed', ''])
+                continue
+
+            # Warm up file system caches.
+            _measure(backend_class, locations, jobs, 1)
+
+            duration = _measure(backend_class, locations, jobs, rounds)
+            rows.append([backend_class.name(), f'{duration * 1000:.0f} ms',
+                         f'{duration * 1e6 / len(locations):.0f} us'])
+
+        click.echo(table(['Backend', 'Round', 'Per repository'], rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,7 @@ from sebex.cmd.bootstrap import bootstrap
 from sebex.cmd.foreach import foreach
 from sebex.cmd.graph import graph
 from sebex.cmd.ls import ls
+from sebex.cmd.maintain import maintain
 from sebex.cmd.release import release
 from sebex.cmd.sync import sync
 from sebex.context import Context
@@ -26,6 +27,18 @@ from sebex.log import FatalError, warn
 @click.option('-j', '--jobs', type=click.IntRange(min=1), default=max(32, os.cpu_count() + 4),
               required=True, show_default=True, show_envvar=True, metavar='COUNT',
               help='Set number of parallel running jobs.')
+# Default is a bit below default MaxSessions of OpenSSH server, as sessions are multiplexed.
+@click.option('--connections-per-host', type=click.IntRange(min=1), default=8, required=True,
+              show_default=True, show_envvar=True, metavar='COUNT',
+              help='Maximum number of concurrent Git connections to a single host.')
+@click.option('--mirror-cache', type=click.Path(file_okay=False, writable=True),
+              show_envvar=True, metavar='PATH',
+              help='Directory of bare mirrors shared by workspaces on this host. Repositories '
+                   'are cloned from and fetched through the mirrors, which sync keeps updated.')
+@click.option('--vcs-backend', type=click.Choice(['git', 'libgit2']), default='git',
+              show_default=True, show_envvar=True,
+              help='How to query state of local repositories: by running git, or in-process '
+                   'with libgit2 (requires the libgit2 extra). Network operations always use git.')
 @click.option('--github_access_token', required=True, show_envvar=True, metavar='TOKEN',
               help='Github private access token.')
 def cli(**kwargs):
@@ -36,6 +49,7 @@ cli.add_command(bootstrap)
 cli.add_command(foreach)
 cli.add_command(graph)
 cli.add_command(ls)
+cli.add_command(maintain)
 cli.add_command(release)
 cli.add_command(sync)
 
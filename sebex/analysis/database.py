@@ -47,9 +47,16 @@ class AnalysisDatabase:
             raise AnalysisError(f'Project not found: "{project}". Make sure projects are synced via `sebex sync`.')
 
     @classmethod
-    def collect(cls, projects: Iterable[ProjectHandle]) -> 'AnalysisDatabase':
+    def collect(cls, projects: Iterable[ProjectHandle],
+                remote: bool = False) -> 'AnalysisDatabase':
+        """
+        Analyze given projects, as they are in the working tree, or if `remote` is set,
+        as they are on the remote default branch, as of last fetch.
+        """
+
         projects = list(projects)
-        projects = zip(projects, for_each(projects, cls._do_collect, desc='Analyzing'))
+        projects = zip(projects, for_each(projects, lambda p: cls._do_collect(p, remote),
+                                          desc='Analyzing'))
         # Filter out ignored
         projects = filter(lambda t: t[1][1], projects)
         projects = dict(projects)
@@ -63,16 +70,22 @@ class AnalysisDatabase:
         return cls(projects, package_name_index)
 
     @staticmethod
-    def _do_collect(project: ProjectHandle) -> Tuple[Language, Optional[AnalysisEntry]]:
+    def _do_collect(project: ProjectHandle,
+                    remote: bool) -> Tuple[Language, Optional[AnalysisEntry]]:
         with operation('Analyzing', project) as reporter:
-            language = detect_language(project)
+            ref = None
+            if remote:
+                vcs = project.repo.vcs
+                ref = f'{vcs.default_remote}/{vcs.default_branch}'
+
+            language = detect_language(project, ref)
 
             if language is Language.UNKNOWN:
                 reporter(_UNKNOWN_LANGUAGE)
                 return language, None
 
             support = language_support_for(language)
-            entry = support.analyze(project)
+            entry = support.analyze(project, ref)
             return language, entry
 
     @classmethod
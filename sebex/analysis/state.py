@@ -7,7 +7,7 @@ from sebex.analysis.graph import DependentsGraph
 from sebex.config.profile import current_project_handles
 
 
-def analyze() -> Tuple[AnalysisDatabase, DependentsGraph]:
-    database = AnalysisDatabase.collect(current_project_handles())
+def analyze(remote: bool = False) -> Tuple[AnalysisDatabase, DependentsGraph]:
+    database = AnalysisDatabase.collect(current_project_handles(), remote=remote)
     graph = DependentsGraph.build(database)
     return database, graph
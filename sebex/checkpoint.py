@@ -0,0 +1,35 @@
+from typing import List, Callable, Optional
+
+
+class Checkpoints:
+    """
+    Names of already completed sub-steps of a long-running operation.
+
+    Operations check whether a sub-step has been reached before doing it, so that when rerun after
+    a failure, they resume from the last completed sub-step instead of starting over.
+
+    >>> checkpoints = Checkpoints()
+    >>> checkpoints.reached('fetch')
+    False
+    >>> checkpoints.mark('fetch')
+    >>> checkpoints.reached('fetch'), bool(checkpoints)
+    (True, True)
+    """
+
+    def __init__(self, reached: Optional[List[str]] = None,
+                 on_change: Optional[Callable[[], None]] = None):
+        self._reached = reached if reached is not None else []
+        self._on_change = on_change
+
+    def reached(self, name: str) -> bool:
+        return name in self._reached
+
+    def mark(self, name: str):
+        if name not in self._reached:
+            self._reached.append(name)
+
+            if self._on_change is not None:
+                self._on_change()
+
+    def __bool__(self) -> bool:
+        return bool(self._reached)
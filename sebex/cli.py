@@ -3,6 +3,7 @@ import click
 from sebex.analysis.version import Version
 from sebex.config.manifest import ProjectHandle, Manifest
 from sebex.context import Context
+from sebex.log import terminal, prefix
 from typing import Tuple
 
 
@@ -47,8 +48,19 @@ SOURCE = SourceType()
 
 
 def confirm(text: str) -> bool:
+    """
+    Ask user a yes/no question.
+
+    Concurrently running jobs may ask questions at the same time, so all prompts are brokered
+    through the terminal lock: they are asked one by one, each preceded by logs of the job
+    asking it.
+    """
+
     ctx = Context.current()
     if ctx.assume_yes:
         return True
     else:
-        return click.confirm(text)
+        with terminal():
+            if prefix():
+                text = f'{prefix()} {text}'
+            return click.confirm(text)
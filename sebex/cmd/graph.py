@@ -5,10 +5,13 @@ from sebex.analysis.state import analyze
 
 @click.command()
 @click.option('--view', is_flag=True, help='Preview the graph using GraphViz.')
-def graph(view):
+@click.option('--remote', is_flag=True,
+              help='Analyze remote default branches as of last sync (or fetch-only sync), '
+                   'instead of working trees.')
+def graph(view, remote):
     """Collect and analyze repository dependency graph."""
 
-    database, dep_graph = analyze()
+    database, dep_graph = analyze(remote=remote)
     dot = dep_graph.graphviz(database)
     if view:
         dot.view(cleanup=True)
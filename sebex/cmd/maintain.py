@@ -0,0 +1,75 @@
+import sys
+import threading
+import time
+from typing import List, Optional
+
+import click
+
+from sebex.config.manifest import RepositoryHandle
+from sebex.config.profile import current_repository_handles
+from sebex.jobs import for_each
+from sebex.log import log, success, table, error
+
+# Git has built-in file system monitor on these platforms only.
+_FSMONITOR_PLATFORMS = ('darwin', 'win32')
+
+
+@click.command()
+@click.option('--io-jobs', type=click.IntRange(min=1), default=4, show_default=True,
+              metavar='COUNT', help='Maximum number of repositories maintained at the same time.')
+@click.option('--fsmonitor/--no-fsmonitor', default=sys.platform in _FSMONITOR_PLATFORMS,
+              help='Watch file system for changes to speed up git status. '
+                   'Enabled by default on macOS and Windows only.')
+def maintain(io_jobs: int, fsmonitor: bool):
+    """
+    Optimize repositories in current profile.
+
+    Loose objects and refs are packed, packs are incrementally repacked into a multi-pack index,
+    commit graph is written and untracked cache is enabled, so that status and fetch do not
+    slow down over time. Repacking is I/O heavy, so only a few repositories are maintained
+    at the same time.
+    """
+
+    io = threading.BoundedSemaphore(io_jobs)
+
+    def do_maintain(repo: RepositoryHandle) -> Optional[List[str]]:
+        if not repo.exists():
+            error('Repository is not cloned:', repo)
+            return None
+
+        with io:
+            size_before, status_before = repo.vcs.disk_usage(), _time_status(repo)
+            repo.vcs.maintain(fsmonitor=fsmonitor)
+            size_after, status_after = repo.vcs.disk_usage(), _time_status(repo)
+
+        return [str(repo), _format_size(size_before), _format_size(size_after),
+                f'{status_before * 1000:.0f} ms', f'{status_after * 1000:.0f} ms']
+
+    repos = list(current_repository_handles())
+    rows = for_each(repos, do_maintain, desc='Maintaining')
+    rows = [row for row in rows if row is not None]
+
+    log()
+    log(table(['Repository', 'Size before', 'Size after', 'Status before', 'Status after'],
+              rows))
+    success('Successfully maintained', len(rows), 'repositories.')
+
+
+def _time_status(repo: RepositoryHandle) -> float:
+    start = time.perf_counter()
+    repo.vcs.git.git.status('--porcelain')
+    return time.perf_counter() - start
+
+
+def _format_size(size: int) -> str:
+    """
+    >>> _format_size(512), _format_size(3 * 1024 * 1024 + 1)
+    ('512 B', '3.0 MiB')
+    """
+
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f'{size} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+    return f'{size:.1f} GiB'
@@ -4,8 +4,14 @@ from sebex.analysis.state import analyze
 from sebex.analysis.version import Version
 from sebex.cli import confirm, SOURCE
 from sebex.config.manifest import ProjectHandle, Manifest
-from sebex.log import success, log, fatal, operation, warn
-from sebex.release.executor import Action, plan as execute_plan, proceed as proceed_plan
+from sebex.config.workspace import WorkspaceConfig
+from sebex.log import success, log, fatal, operation, warn, error
+from sebex.poll import Backoff
+from sebex.release.executor import Action, plan as execute_plan, proceed as proceed_plan, \
+    watch as watch_plan, upcoming
+from sebex.release.preflight import preflight as run_preflight, describe_blockers
+from sebex.release.lock import ReleaseLocks
+from sebex.release.simulation import Simulation, DEFAULT_LATENCIES, parse_latencies
 from sebex.release.state import ReleaseState
 from typing import Optional, Dict, Tuple
 
@@ -16,21 +22,72 @@ def release():
     Prepare and execute release plan for managed package.
     """
 
-    pass
+    _migrate_legacy_release()
+
+
+def _migrate_legacy_release():
+    rel = ReleaseState.open_legacy()
+    if rel is None:
+        return
+
+    if ReleaseState.exists(rel.name):
+        fatal(f'Found release saved by older version of Sebex, but release "{rel.name}" '
+              f'exists already.', 'Please remove one of them.')
+
+    with operation(f'Migrating release "{rel.codename()}" to {rel.name}'):
+        with ReleaseLocks.exclusive() as locks:
+            _check_locks(rel, locks)
+            locks.acquire(rel.name, rel.projects())
+            rel.save()
+
+        ReleaseState.delete_legacy()
+
+
+_RELEASE_OPTION = click.option('-r', '--release', 'release_name', metavar='NAME',
+                               help='Name of the release to operate on, may be omitted if '
+                                    'there is only one release pending.')
 
 
 @release.command()
-def status():
+@_RELEASE_OPTION
+def status(release_name: Optional[str]):
     """
-    Show status of currently pending release (if any).
+    Show status of currently pending releases (if any).
     """
 
-    if ReleaseState.exists():
-        rel = ReleaseState.open()
-        log(rel.describe())
-    else:
+    if release_name is not None:
+        log(_open_release(release_name).describe())
+        return
+
+    names = ReleaseState.pending()
+    if not names:
         success('There is no release pending at this moment, feel free to start one.')
 
+    for name in names:
+        log(ReleaseState.open(name).describe())
+
+
+def _open_release(release_name: Optional[str]) -> ReleaseState:
+    if release_name is not None:
+        if not ReleaseState.exists(release_name):
+            fatal(f'There is no pending release named "{release_name}".')
+        return ReleaseState.open(release_name)
+
+    names = ReleaseState.pending()
+    if not names:
+        fatal('There is no release pending at this moment. Please create one beforehand.')
+    elif len(names) > 1:
+        fatal('There are multiple releases pending:', ', '.join(names) + '.',
+              'Please choose one with the --release option.')
+
+    return ReleaseState.open(names[0])
+
+
+def _ensure_releasable():
+    if WorkspaceConfig.open().sparse:
+        fatal('This workspace is sparse and is meant for analysis only.',
+              'Please run "sebex sync --full" before releasing.')
+
 
 def gather_input() -> Dict[Version, ProjectHandle]:
     sources = {}
@@ -81,9 +138,13 @@ def valid_project(value: str) -> Optional[ProjectHandle]:
 @click.option('--dry', is_flag=True,
               help='Print what would be done, but do not persist the generated plan.')
 @click.option('--source', '-s', multiple=True, type=SOURCE)
-def plan(dry: bool, source):
+@click.option('-r', '--release', 'release_name', metavar='NAME',
+              help='Name of the release, derived from its codename if not specified.')
+def plan(dry: bool, source, release_name: Optional[str]):
     """
     Prepare release plan for managed packages.
+
+    Multiple releases may be pending at the same time, as long as they do not share projects.
     """
 
     # gather project names of packages to be released if none were passed via --source option
@@ -95,53 +156,186 @@ def plan(dry: bool, source):
             sources[p] = v
 
     if not dry:
-        if ReleaseState.exists():
-            rel = ReleaseState.open()
-            fatal(f'Release "{rel.codename()}" is already running.',
-                  'Please finish it before creating new one.')
+        _ensure_releasable()
+
+    if not dry and release_name is not None and ReleaseState.exists(release_name):
+        fatal(f'Release "{release_name}" is already running.',
+              'Please finish it before creating new one, or choose a different name.')
 
     database, graph = analyze()
     rel = ReleaseState.plan(sources, database, graph)
+    rel.name = release_name if release_name is not None else rel.default_name()
 
     log()
     log(rel.describe())
 
     if not dry:
+        if ReleaseState.exists(rel.name):
+            fatal(f'Release "{rel.name}" is already running.',
+                  'Please finish it before creating new one.')
+
+        _check_locks(rel)
+
         if confirm('Save this release?'):
-            with operation(f'Saving release "{rel.codename()}"'):
-                rel.save()
+            with operation(f'Saving release "{rel.codename()}" as {rel.name}'):
+                with ReleaseLocks.exclusive() as locks:
+                    _check_locks(rel, locks)
+                    locks.acquire(rel.name, rel.projects())
+                    rel.save()
+
+
+def _check_locks(rel: ReleaseState, locks: ReleaseLocks = None):
+    if locks is None:
+        locks = ReleaseLocks.open()
+
+    conflicts = locks.conflicts(rel.name, rel.projects())
+    if conflicts:
+        for project, owner in sorted(conflicts.items()):
+            error(f'Project {project} is already being released by "{owner}".')
+        fatal('This release overlaps with other pending releases.',
+              'Please finish them before creating this one.')
+
+
+_PIPELINE_OPTION = click.option(
+    '--pipeline', is_flag=True,
+    help='Do not wait for whole phases to finish, start releasing each project as soon as its '
+         'dependencies are released.')
+
+
+_PREFLIGHT_OPTION = click.option(
+    '--preflight/--no-preflight', default=True, show_default=True,
+    help='Check upcoming projects for problems before making any changes.')
+
+
+@release.command()
+@_PIPELINE_OPTION
+@_RELEASE_OPTION
+def preflight(pipeline: bool, release_name: Optional[str]):
+    """
+    Check projects of upcoming phase for problems which would block their release.
+    """
+
+    _ensure_releasable()
+    rel = _open_release(release_name)
+    if _preflight(rel, pipeline):
+        success('No problems found, ready to proceed.')
+
+
+def _preflight(rel: ReleaseState, pipeline: bool) -> bool:
+    blockers = run_preflight(upcoming(rel, pipelined=pipeline))
+    if blockers:
+        log(describe_blockers(blockers))
+        error(f'Found {len(blockers)} problems which will block the release.')
+        return False
+
+    return True
 
 
 @release.command()
 @click.option('--dry', is_flag=True,
               help='Print what would be done, but do not perform any changes.')
-def proceed(dry: bool):
+@_PIPELINE_OPTION
+@_PREFLIGHT_OPTION
+@_RELEASE_OPTION
+def proceed(dry: bool, pipeline: bool, preflight: bool, release_name: Optional[str]):
     """
     Execute saved release plan until next breakpoint or new phase.
     """
 
-    if not ReleaseState.exists():
-        fatal('There is no release pending at this moment. Please create one beforehand.')
-
-    rel = ReleaseState.open()
+    _ensure_releasable()
+    rel = _open_release(release_name)
     if dry:
-        for task in execute_plan(rel):
+        for task in execute_plan(rel, pipelined=pipeline):
             log(f'{task.project.project}: {task.human_name}')
     else:
-        with operation('Proceeding release'):
+        if preflight and not _preflight(rel, pipeline):
+            fatal('Please fix these problems, or rerun with --no-preflight.')
+
+        with operation(f'Proceeding release "{rel.name}"'):
             with rel.transaction():
-                action = proceed_plan(rel)
+                action = proceed_plan(rel, pipelined=pipeline)
 
-        if action == Action.FINISH:
-            if rel.is_done():
-                success('Release finished successfully!')
+        _report(rel, action)
 
-                with operation('Removing release state file'):
+
+@release.command()
+@click.option('--speedup', type=click.FloatRange(min=1), default=1000, show_default=True,
+              help='How many times faster than real time the simulation runs.')
+@click.option('--seed', type=int, help='Seed of random latencies, for reproducible results.')
+@click.option('--latency', 'latencies', multiple=True, metavar='OPERATION=MEAN[:SPREAD]',
+              help='Override latency distribution (in seconds) of simulated operation, one of: '
+                   f'{", ".join(DEFAULT_LATENCIES)}.')
+@_PIPELINE_OPTION
+@_RELEASE_OPTION
+def simulate(speedup: float, seed: Optional[int], latencies: Tuple[str, ...], pipeline: bool,
+             release_name: Optional[str]):
+    """
+    Predict the course of saved release plan without performing any changes.
+
+    The real executor is run against in-memory fakes of Git, GitHub and package publishing,
+    which take randomized amounts of time. Prints predicted timeline of all operations and
+    the maximum number of projects released in parallel.
+    """
+
+    rel = _open_release(release_name)
+
+    try:
+        simulation = Simulation(parse_latencies(latencies), speedup=speedup, seed=seed)
+    except ValueError as e:
+        fatal(str(e))
+
+    with operation(f'Simulating release "{rel.name}"'):
+        report = simulation.run(rel, pipelined=pipeline)
+
+    log(report.describe())
+
+
+@release.command()
+@click.option('--interval', type=click.FloatRange(min=1), default=15, show_default=True,
+              metavar='SECONDS', help='Initial delay between polls of pull requests.')
+@click.option('--max-interval', type=click.FloatRange(min=1), default=300, show_default=True,
+              metavar='SECONDS', help='Maximum delay between polls of pull requests.')
+@_PIPELINE_OPTION
+@_PREFLIGHT_OPTION
+@_RELEASE_OPTION
+def watch(interval: float, max_interval: float, pipeline: bool, preflight: bool,
+          release_name: Optional[str]):
+    """
+    Execute saved release plan, waiting for release pull requests to become mergeable.
+
+    Open pull requests are polled concurrently, and each project is advanced through merging,
+    tagging and publishing as soon as its checks pass. Run with --assumeyes to merge and publish
+    without asking.
+    """
+
+    _ensure_releasable()
+    rel = _open_release(release_name)
+    if preflight and not _preflight(rel, pipeline):
+        fatal('Please fix these problems, or rerun with --no-preflight.')
+
+    def backoff():
+        return Backoff(initial=interval, maximum=max(interval, max_interval))
+
+    with operation(f'Watching release "{rel.name}"'):
+        with rel.transaction():
+            action = watch_plan(rel, pipelined=pipeline, backoff=backoff)
+
+    _report(rel, action)
+
+
+def _report(rel: ReleaseState, action: Action):
+    if action == Action.FINISH:
+        if rel.is_done():
+            success('Release finished successfully!')
+
+            with operation('Removing release state file'):
+                with ReleaseLocks.exclusive() as locks:
                     rel.delete()
-            else:
-                success(
-                    f'The phase "{rel.current_phase().codename()}" has finished successfully!')
-                warn('To proceed, rerun this command.')
-        elif action == Action.BREAKPOINT:
-            warn('A breakpoint has been reached!')
-            warn('Do necessary manual actions and go back here by rerunning this command.')
+                    locks.release(rel.name)
+        else:
+            success(
+                f'The phase "{rel.current_phase().codename()}" has finished successfully!')
+            warn('To proceed, rerun this command.')
+    elif action == Action.BREAKPOINT:
+        warn('A breakpoint has been reached!')
+        warn('Do necessary manual actions and go back here by rerunning this command.')
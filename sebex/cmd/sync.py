@@ -1,31 +1,99 @@
+from typing import Optional
+
 import click
 from git import Repo
 
 from sebex.config.manifest import RepositoryManifest
 from sebex.config.profile import current_repositories
+from sebex.config.workspace import WorkspaceConfig
+from sebex.context import Context
 from sebex.jobs import for_each
+from sebex.language import analysis_directories
 from sebex.log import error, success, operation
+from sebex import mirror
+from sebex.ssh import connection
 
 
 @click.command()
 @click.option('--clone/--no-clone', default=True, help='Attempt to clone new repositories.')
 @click.option('--fetch/--pull', default=False, help='Run fetch only, do not pull any changes.')
-def sync(clone, fetch):
-    """Sync repositories in current profile."""
+@click.option('--skip-unchanged/--no-skip-unchanged', default=True,
+              help='List remote refs first and fetch only repositories in which they changed.')
+@click.option('--filter', 'clone_filter', metavar='FILTER',
+              help='Clone repositories partially, e.g. blob:none to download file contents only '
+                   'when needed. Remembered for the workspace.')
+@click.option('--depth', type=click.IntRange(min=1), metavar='DEPTH',
+              help='Clone and fetch only DEPTH most recent commits. Remembered for the workspace.')
+@click.option('--sparse', is_flag=True,
+              help='Check out only files needed for analysis, implies --filter=blob:none. '
+                   'Releases cannot be made from sparse workspaces. Remembered for the workspace.')
+@click.option('--full', is_flag=True,
+              help='Forget the remembered --filter, --depth and --sparse, new clones will be '
+                   'complete and all files will be checked out.')
+def sync(clone, fetch, skip_unchanged: bool, clone_filter: Optional[str], depth: Optional[int],
+         sparse: bool, full: bool):
+    """
+    Sync repositories in current profile.
+
+    Git connections to each host are multiplexed over a single SSH connection, and their number
+    is limited by the global --connections-per-host option. Repositories whose remote branches
+    and tags did not move since last sync are not fetched at all.
+    """
+
+    with WorkspaceConfig.open().transaction() as config:
+        if full:
+            config.clone_filter = None
+            config.depth = None
+            config.sparse = False
+
+        if clone_filter is not None:
+            config.clone_filter = clone_filter
+
+        if depth is not None:
+            config.depth = depth
+
+        if sparse:
+            config.sparse = True
+
+    clone_options = config.clone_options()
+    mirror_cache = Context.current().mirror_cache_path
 
     def do_sync(manifest: RepositoryManifest):
         repo = manifest.handle
+        mirror_location = None
+        if mirror_cache is not None:
+            mirror_location = mirror.mirror_location(mirror_cache, manifest.remote_url)
+
         if not repo.exists():
-            if clone:
+            if not clone:
+                error('Repository is not cloned:', repo)
+            elif mirror_location is not None:
+                mirror.update(mirror_location, manifest.remote_url, repo)
                 with operation('Cloning', repo):
-                    Repo.clone_from(manifest.remote_url, manifest.location)
+                    Repo.clone_from(manifest.remote_url, manifest.location, **clone_options,
+                                    **mirror.clone_options(mirror_location, manifest.remote_url))
             else:
-                error('Repository is not cloned:', repo)
+                with operation('Cloning', repo), connection(manifest.remote_url) as env:
+                    Repo.clone_from(manifest.remote_url, manifest.location, env=env,
+                                    **clone_options)
         else:
-            if fetch:
-                repo.vcs.fetch()
-            else:
-                repo.vcs.pull()
+            repo.vcs.use_mirror(mirror_location)
+
+            if not skip_unchanged or not repo.vcs.is_synced(pull=not fetch):
+                if fetch:
+                    repo.vcs.fetch()
+                else:
+                    repo.vcs.pull()
+
+        if repo.exists():
+            if config.sparse:
+                directories = {d for p in manifest.project_handles()
+                               for d in analysis_directories(p)}
+                # Rewriting the same patterns would still walk the whole working tree.
+                if repo.vcs.sparse_directories() != directories:
+                    repo.vcs.set_sparse_checkout(sorted(directories))
+            elif repo.vcs.is_sparse():
+                repo.vcs.disable_sparse_checkout()
 
     repos = list(current_repositories())
     for_each(repos, do_sync, desc='Syncing', item_desc=lambda r: r.handle)
@@ -47,7 +47,10 @@ class ConfigFile:
         return cls(name=name, data=data)
 
     def save(self) -> None:
-        with open(self.format().full_path(self._name), 'w') as f:
+        full_path = self.format().full_path(self._name)
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(full_path, 'w') as f:
             self.format().dump(self._make_data(), f)
 
     def delete(self):
@@ -73,7 +76,7 @@ class ConfigFile:
 
 
 def merge_defaults(base, defaults):
-    return merge_defaults_inner(base, defaults) if base is not None else defaults
+    return merge_defaults_inner(base, defaults) if base is not None else deepcopy(defaults)
 
 
 def merge_defaults_inner(base, defaults):
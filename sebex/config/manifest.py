@@ -43,7 +43,8 @@ class RepositoryHandle:
     # TODO Remove
     @property
     def git(self) -> GitRepo:
-        return GitRepo(self.location)
+        from sebex.repo_pool import pool
+        return pool.get(self.location)
 
     def __str__(self):
         return self.name
@@ -0,0 +1,89 @@
+from typing import Optional, Dict, Any
+
+from sebex.config.file import ConfigFile
+
+
+class WorkspaceConfig(ConfigFile):
+    """
+    Settings of the workspace itself, applying to all repositories in it.
+
+    Repositories may be cloned partially, either without file contents which are not needed
+    (e.g. `blob:none` filter), or with history truncated to given depth. Git fetches missing
+    objects lazily, so all operations performed by Sebex keep working.
+
+    Sparse workspaces go further and check out only files needed for analysis of projects.
+    They are meant for analysis only, releases cannot be made from them.
+    """
+
+    _name = 'workspace'
+    _data = {
+        'clone': {
+            'filter': None,
+            'depth': None,
+            'sparse': False,
+        },
+    }
+
+    @property
+    def clone_filter(self) -> Optional[str]:
+        return self._data['clone']['filter']
+
+    @clone_filter.setter
+    def clone_filter(self, value: Optional[str]):
+        self._data['clone']['filter'] = value
+
+    @property
+    def depth(self) -> Optional[int]:
+        return self._data['clone']['depth']
+
+    @depth.setter
+    def depth(self, value: Optional[int]):
+        self._data['clone']['depth'] = value
+
+    @property
+    def sparse(self) -> bool:
+        return self._data['clone']['sparse']
+
+    @sparse.setter
+    def sparse(self, value: bool):
+        self._data['clone']['sparse'] = value
+
+    def clone_options(self) -> Dict[str, Any]:
+        """
+        Keyword arguments for `git clone`.
+
+        >>> config = WorkspaceConfig(name=None, data={'clone': {'filter': 'blob:none', 'depth': 1}})
+        >>> config.clone_options()
+        {'filter': 'blob:none', 'depth': 1, 'no_single_branch': True}
+        >>> WorkspaceConfig(name=None, data={'clone': {'sparse': True}}).clone_options()
+        {'filter': 'blob:none', 'sparse': True}
+        """
+
+        options = {}
+
+        # Partial clones remember their filter, so later fetches stay partial on their own.
+        if self.clone_filter is not None:
+            options['filter'] = self.clone_filter
+        elif self.sparse:
+            # Without a filter, contents of all files would be downloaded anyway.
+            options['filter'] = 'blob:none'
+
+        if self.depth is not None:
+            options['depth'] = self.depth
+            # Shallow clones fetch only default branch unless told otherwise,
+            # but release branches are needed too.
+            options['no_single_branch'] = True
+
+        if self.sparse:
+            # Initially, check out files in the root directory only.
+            options['sparse'] = True
+
+        return options
+
+    def fetch_options(self) -> Dict[str, Any]:
+        """Keyword arguments for `git fetch` and `git pull`, keeping shallow clones shallow."""
+
+        if self.depth is not None:
+            return {'depth': self.depth}
+
+        return {}
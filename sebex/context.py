@@ -1,10 +1,14 @@
 from contextlib import contextmanager
 from contextvars import ContextVar
 from pathlib import Path
+from typing import Optional
 
 from github import Github
 
+from sebex import github_cache
+
 METADATA_DIRECTORY_NAME = '.sebex'
+CACHE_DIRECTORY_NAME = 'cache'
 
 _context_var = ContextVar('sebex_context')
 
@@ -15,14 +19,25 @@ class Context:
     github: Github
     jobs: int
     assume_yes: bool
+    connections_per_host: int
+    # Host-wide cache of bare mirrors, shared by workspaces.
+    mirror_cache_path: Optional[Path]
+    # Name of backend answering read-only queries about local repositories.
+    vcs_backend: str
 
     def __init__(self, workspace: str, profile: str, github_access_token: str, jobs: int,
-                 assumeyes: bool) -> None:
+                 assumeyes: bool, connections_per_host: int = 8,
+                 mirror_cache: Optional[str] = None, vcs_backend: str = 'git') -> None:
         self.workspace_path = Path(workspace)
         self.profile_name = profile
         self.github = Github(github_access_token)
+        github_cache.install(self.github, github_cache.ResponseCache(
+            self.cache_path / github_cache.GITHUB_CACHE_DIRECTORY, github_access_token))
         self.jobs = jobs
         self.assume_yes = assumeyes
+        self.connections_per_host = connections_per_host
+        self.mirror_cache_path = Path(mirror_cache).resolve() if mirror_cache else None
+        self.vcs_backend = vcs_backend
 
     @classmethod
     def current(cls) -> 'Context':
@@ -44,3 +59,8 @@ class Context:
     @property
     def meta_path(self) -> Path:
         return self.workspace_path / METADATA_DIRECTORY_NAME
+
+    @property
+    def cache_path(self) -> Path:
+        """Directory for caches shared by all projects of the workspace."""
+        return self.meta_path / CACHE_DIRECTORY_NAME
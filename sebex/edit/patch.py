@@ -20,6 +20,15 @@ def patch_readme(file: Path, project: str, to_version: str):
         f.writelines(new_lines)
 
 
+def patch_readme_str(text: str, project: str, to_version: str) -> str:
+    """
+    >>> patch_readme_str('deps:\\n\\t{:foo, "~> 0.1.0"}\\n', 'foo', '0.2.0')
+    'deps:\\n\\t{:foo, "~> 0.2.0"}\\n'
+    """
+    return ''.join(_patch_readme_line(line, project, to_version)
+                   for line in text.splitlines(keepends=True))
+
+
 def _patch_readme_line(line, project, to_version):
     pattern = re.compile(r'".*\d+\.\d+\.\d+.*"')
     if f'{{:{project}, "' in line and re.search(pattern, line):
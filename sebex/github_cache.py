@@ -0,0 +1,107 @@
+"""
+Persistent cache of GitHub API responses, revalidated with conditional requests.
+
+Every GET request is sent with `If-None-Match`/`If-Modified-Since` headers of its cached
+response, if there is one. GitHub answers requests for unchanged resources with 304 Not Modified,
+which is fast and does not count against the rate limit, and the cached response is used instead.
+Responses are always revalidated, so the cache never serves stale data.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from github import Github
+
+GITHUB_CACHE_DIRECTORY = 'github'
+
+_Response = Tuple[int, Dict[str, Any], str]
+_RequestJson = Callable[..., _Response]
+
+
+class ResponseCache:
+    def __init__(self, path: Path, token: Optional[str] = None):
+        self.path = path
+        # Responses depend on who is asking, so they are never shared between tokens.
+        self._salt = hashlib.sha256((token or '').encode()).hexdigest()
+
+    def key(self, url: str, parameters: Optional[Dict[str, Any]],
+            headers: Optional[Dict[str, Any]]) -> str:
+        material = json.dumps([self._salt, url, sorted((parameters or {}).items()),
+                               (headers or {}).get('Accept')], default=str)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file(key)) as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key: str, entry: Dict[str, Any]):
+        file = self._file(key)
+        file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write atomically, concurrent jobs may read the same entry.
+        fd, tmp = tempfile.mkstemp(dir=file.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                json.dump(entry, fp)
+            os.replace(tmp, file)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _file(self, key: str) -> Path:
+        return self.path / key[:2] / f'{key}.json'
+
+
+def cached(request_json: _RequestJson, cache: ResponseCache) -> _RequestJson:
+    """Wrap PyGithub's `Requester.requestJson`, making GET requests conditional."""
+
+    def wrapper(verb: str, url: str, parameters=None, headers=None, input=None,
+                cnx=None) -> _Response:
+        conditional = {'If-None-Match', 'If-Modified-Since'} & set(headers or {})
+        if verb != 'GET' or input is not None or conditional:
+            # Callers making their own conditional requests want to see 304 responses.
+            return request_json(verb, url, parameters, headers, input, cnx)
+
+        key = cache.key(url, parameters, headers)
+        entry = cache.load(key)
+
+        headers = dict(headers or {})
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last-modified'):
+                headers['If-Modified-Since'] = entry['last-modified']
+
+        status, response_headers, output = request_json(verb, url, parameters, headers,
+                                                        input, cnx)
+
+        if status == 304 and entry is not None:
+            return 200, {**entry['headers'], **response_headers}, entry['body']
+
+        if status == 200 and ('etag' in response_headers or
+                              'last-modified' in response_headers):
+            cache.store(key, {
+                'etag': response_headers.get('etag'),
+                'last-modified': response_headers.get('last-modified'),
+                'headers': response_headers,
+                'body': output,
+            })
+
+        return status, response_headers, output
+
+    return wrapper
+
+
+def install(github: Github, cache: ResponseCache):
+    """Make all requests of given client, and objects obtained through it, use the cache."""
+
+    # All objects obtained from the client share its requester.
+    requester = github._Github__requester
+    requester.requestJson = cached(requester.requestJson, cache)
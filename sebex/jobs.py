@@ -1,8 +1,8 @@
-from concurrent.futures import ThreadPoolExecutor
-from typing import TypeVar, Iterable, Callable, List, Optional
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, Future
+from typing import TypeVar, Iterable, Callable, List, Optional, Tuple, Dict
 
 from sebex.context import Context
-from sebex.log import error
+from sebex.log import error, FatalError
 
 T = TypeVar('T')
 R = TypeVar('R')
@@ -17,7 +17,51 @@ def for_each(iterable: Iterable[T], f: Callable[[T], R],
     context = Context.current()
 
     whole_iterable = list(iterable)
+    run = _job(context, f, desc, item_desc)
 
+    with ThreadPoolExecutor(max_workers=context.jobs) as executor:
+        return list(executor.map(run, whole_iterable))
+
+
+def pipeline(iterable: Iterable[T], f: Callable[[T], R], is_ready: Callable[[T], bool],
+             desc: str, item_desc: Callable[[T], Optional[str]] = str) -> List[Tuple[T, R]]:
+    """
+    Run `f` for each item as soon as it becomes ready.
+
+    Readiness of waiting items is re-evaluated each time any job completes, so jobs may make
+    other items ready by mutating shared state. Each item is run at most once, items which never
+    become ready are not run at all. Returns pairs of items and results, in completion order.
+    """
+
+    context = Context.current()
+
+    waiting = list(iterable)
+    run = _job(context, f, desc, item_desc)
+    results: List[Tuple[T, R]] = []
+
+    with ThreadPoolExecutor(max_workers=context.jobs) as executor:
+        running: Dict[Future, T] = {}
+
+        def submit_ready():
+            for item in list(waiting):
+                if is_ready(item):
+                    waiting.remove(item)
+                    running[executor.submit(run, item)] = item
+
+        submit_ready()
+        while running:
+            done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+            for future in done:
+                item = running.pop(future)
+                results.append((item, future.result()))
+
+            submit_ready()
+
+    return results
+
+
+def _job(context: Context, f: Callable[[T], R], desc: str,
+         item_desc: Callable[[T], Optional[str]]) -> Callable[[T], R]:
     def run(item: T) -> R:
         this_item_desc = item_desc(item)
 
@@ -29,11 +73,11 @@ def for_each(iterable: Iterable[T], f: Callable[[T], R],
         try:
             with Context.activate(context):
                 return f(item)
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, FatalError):
+            # Fatal errors have already been reported, let them abort the whole command.
             raise
         except Exception as e:
             error(f'Job "{job_desc}" failed!')
             raise JobError(job_desc) from e
 
-    with ThreadPoolExecutor(max_workers=context.jobs) as executor:
-        return list(executor.map(run, whole_iterable))
+    return run
@@ -1,4 +1,4 @@
-from typing import List, Type
+from typing import List, Type, Optional
 
 from sebex.analysis.model import Language
 from sebex.language.abc import LanguageSupport
@@ -13,9 +13,27 @@ def all_languages() -> List[Type[LanguageSupport]]:
     ]
 
 
-def detect_language(project: ProjectHandle) -> Language:
+def analysis_directories(project: ProjectHandle) -> List[str]:
+    """
+    Directories (relative to repository root) containing files needed to analyze given project,
+    whatever its language is. The root directory is omitted.
+
+    >>> analysis_directories(ProjectHandle.parse('repo:plugins/x'))
+    ['plugins/x']
+    >>> analysis_directories(ProjectHandle.parse('repo'))
+    []
+    """
+
+    directories = {(project.path / file).parent.as_posix()
+                   for support in all_languages()
+                   for file in support.analysis_files()}
+
+    return sorted(directories - {'.'})
+
+
+def detect_language(project: ProjectHandle, ref: Optional[str] = None) -> Language:
     for support in all_languages():
-        if support.test_project(project):
+        if support.test_project(project, ref):
             return support.language()
 
     return Language.UNKNOWN
@@ -1,27 +1,61 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, TYPE_CHECKING
 
 from sebex.analysis.model import Language, AnalysisEntry, DependencyUpdate
 from sebex.analysis.version import Version
+from sebex.checkpoint import Checkpoints
 from sebex.config.manifest import ProjectHandle
 from sebex.edit.span import Span
 
+if TYPE_CHECKING:
+    from sebex.vcs import Vcs
+
 
 class LanguageSupport(ABC):
     @classmethod
     @abstractmethod
     def language(cls) -> Language: ...
 
+    # When `ref` is given, project files are read at that revision of project's repository,
+    # instead of the working tree.
+
     @classmethod
     @abstractmethod
-    def test_project(cls, project: ProjectHandle) -> bool: ...
+    def test_project(cls, project: ProjectHandle, ref: Optional[str] = None) -> bool: ...
 
+    @classmethod
     @abstractmethod
-    def analyze(self, project: ProjectHandle) -> AnalysisEntry: ...
+    def analysis_files(cls) -> List[str]:
+        """Paths of files (relative to project root) read by `test_project` and `analyze`."""
+        ...
 
     @abstractmethod
-    def write_release(self, project: ProjectHandle, to_version: Version, to_version_span: Span,
-                      dependency_updates: List[DependencyUpdate]): ...
+    def analyze(self, project: ProjectHandle, ref: Optional[str] = None) -> AnalysisEntry: ...
+
+    # Release changes are committed directly to the `branch`, which is not checked out anywhere.
+    # Implementations may commit with `Vcs.commit_files`, or ask for a worktree of the branch
+    # when they need to run tools on project files.
 
     @abstractmethod
-    def publish(self, project: ProjectHandle) -> bool: ...
+    def write_release(self, project: ProjectHandle, branch: str, to_version: Version,
+                      to_version_span: Span, dependency_updates: List[DependencyUpdate],
+                      checkpoints: Optional[Checkpoints] = None,
+                      vcs: Optional['Vcs'] = None): ...
+
+    # Given `vcs` may operate on a worktree instead of the main clone of project's repository.
+    # Dry runs of many projects may be run concurrently and reviewed at once, before publishing
+    # them for real.
+
+    @abstractmethod
+    def dry_run_publish(self, project: ProjectHandle, vcs: Optional['Vcs'] = None): ...
+
+    @abstractmethod
+    def publish(self, project: ProjectHandle, vcs: Optional['Vcs'] = None) -> bool: ...
+
+    def check_publish(self, project: ProjectHandle) -> List[str]:
+        """Find problems which would prevent publishing the project, without publishing it."""
+        return []
+
+    def is_available(self, package: str, version: Version) -> bool:
+        """Check whether published package release can already be fetched by dependents."""
+        return True
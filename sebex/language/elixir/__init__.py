@@ -1,30 +1,71 @@
 import json
 import os
+import tempfile
+from contextlib import contextmanager
 from importlib import resources
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Iterator
+
+import click
 
 from sebex.analysis.model import AnalysisEntry, Dependency, Release, Language, DependencyUpdate
 from sebex.analysis.version import VersionSpec, Version
+from sebex.checkpoint import Checkpoints
 from sebex.cli import confirm
 from sebex.config.manifest import Manifest, ProjectHandle
-from sebex.edit.patch import patch_file, patch_readme
+from sebex.edit.patch import patch_str, patch_readme_str
 from sebex.edit.span import Span
 from sebex.language.abc import LanguageSupport
+from sebex.language.elixir.hex import is_resolvable
 from sebex.log import operation, warn, fatal
 from sebex.popen import popen
+from sebex.vcs import Vcs
+
+_SKIP = click.style('SKIPPED', fg='yellow')
+
+
+def mix_file(location: Path) -> Path:
+    return location / 'mix.exs'
+
+
+def mix_lock(location: Path) -> Path:
+    return location / 'mix.lock'
 
 
-def mix_file(project: ProjectHandle) -> Path:
-    return project.location / 'mix.exs'
+def readme_file(location: Path) -> Path:
+    return location / 'README.md'
 
 
-def mix_lock(project: ProjectHandle) -> Path:
-    return project.location / 'mix.lock'
+@contextmanager
+def _file_at(project: ProjectHandle, file: Path, ref: Optional[str]) -> Iterator[Path]:
+    """
+    Yield path of project file, as it is in the working tree or at given revision.
+    In the latter case, the file is written to a temporary directory.
+    """
 
+    if ref is None:
+        yield project.location / file
+        return
 
-def readme_file(project: ProjectHandle) -> Path:
-    return project.location / 'README.md'
+    content = project.repo.vcs.read_file(ref, project.path / file)
+    if content is None:
+        fatal(f'File {file} of {project} does not exist at {ref}.')
+
+    with tempfile.TemporaryDirectory(prefix='sebex-') as directory:
+        path = Path(directory) / file
+        path.write_bytes(content)
+        yield path
+
+
+def mix(args: List[str], location: Path, **kwargs):
+    """
+    Run Mix task in given project.
+
+    Hex home is left to the user, its package cache is already shared by all projects
+    and workspaces, and it holds Hex credentials needed for publishing.
+    """
+
+    return popen(['mix', *args], log_stdout=True, cwd=location, **kwargs)
 
 
 class ElixirLanguageSupport(LanguageSupport):
@@ -33,13 +74,21 @@ class ElixirLanguageSupport(LanguageSupport):
         return Language.ELIXIR
 
     @classmethod
-    def test_project(cls, project: ProjectHandle) -> bool:
-        return mix_file(project).exists()
+    def test_project(cls, project: ProjectHandle, ref: Optional[str] = None) -> bool:
+        if ref is not None:
+            return project.repo.vcs.file_exists(ref, mix_file(project.path))
+
+        return mix_file(project.location).exists()
 
-    def analyze(self, project: ProjectHandle) -> AnalysisEntry:
+    @classmethod
+    def analysis_files(cls) -> List[str]:
+        return ['mix.exs', 'mix.lock', 'README.md']
+
+    def analyze(self, project: ProjectHandle, ref: Optional[str] = None) -> AnalysisEntry:
         import re
-        with resources.path(__name__, 'elixir_analyzer') as elixir_analyzer:
-            proc = popen([elixir_analyzer, '--mix', mix_file(project)])
+        with resources.path(__name__, 'elixir_analyzer') as elixir_analyzer, \
+                _file_at(project, Path('mix.exs'), ref) as mix_exs:
+            proc = popen([elixir_analyzer, '--mix', mix_exs])
             analyzer_report = re.findall("<SEBEX_ELIXIR_ANALYZER_REPORT>(.*?)</SEBEX_ELIXIR_ANALYZER_REPORT>", proc.stdout, re.DOTALL)
             analyzer_report = analyzer_report[0]
             raw = json.loads(analyzer_report)
@@ -72,49 +121,97 @@ class ElixirLanguageSupport(LanguageSupport):
         return AnalysisEntry(package=package, version=version, version_span=version_span,
                              dependencies=dependencies, releases=releases)
 
-    def write_release(self, project: ProjectHandle, to_version: Version, to_version_span: Span,
-                      dependencies: List[DependencyUpdate]):
-        with operation('Update mix.exs'):
-            patch_file(mix_file(project), [
-                (to_version_span, f'"{to_version}"'),
-                *[(dep.to_spec_span, self._translate_version_spec(dep.to_spec))
-                  for dep in dependencies]
-            ])
-            project.repo.vcs.commit(f'bump to {to_version}', [mix_file(project)])
-
-        with operation('Update README.md'):
-            patch_readme(readme_file(project), str(project), str(to_version))
-            project.repo.vcs.commit(f'update readme', [readme_file(project)])
+    def write_release(self, project: ProjectHandle, branch: str, to_version: Version,
+                      to_version_span: Span, dependencies: List[DependencyUpdate],
+                      checkpoints: Optional[Checkpoints] = None,
+                      vcs: Optional[Vcs] = None):
+        if checkpoints is None:
+            checkpoints = Checkpoints()
 
+        if vcs is None:
+            vcs = project.repo.vcs
 
-        if project.repo.vcs.is_tracked(mix_lock(project)):
-            with operation('Update lockfile'):
-                if popen(['mix', 'deps.update', '--all'], log_stdout=True, check=False, cwd=project.location).returncode == 0 \
+        # Edit files in memory and commit them at once, without checking anything out.
+        with operation('Update mix.exs & README.md') as reporter:
+            if checkpoints.reached('mix.exs'):
+                reporter(_SKIP)
+            else:
+                edits = {}
+
+                mix_exs = mix_file(project.path)
+                edits[mix_exs] = patch_str(vcs.read_file(branch, mix_exs).decode('utf-8'), [
+                    (to_version_span, f'"{to_version}"'),
+                    *[(dep.to_spec_span, self._translate_version_spec(dep.to_spec))
+                      for dep in dependencies]
+                ]).encode('utf-8')
+
+                readme = vcs.read_file(branch, readme_file(project.path))
+                if readme is not None:
+                    edits[readme_file(project.path)] = patch_readme_str(
+                        readme.decode('utf-8'), str(project), str(to_version)).encode('utf-8')
+
+                vcs.commit_files(branch, f'bump to {to_version}', edits)
+                checkpoints.mark('mix.exs')
+
+        if vcs.file_exists(branch, mix_lock(project.path)):
+            with operation('Update lockfile') as reporter:
+                # Only updated dependencies need to be resolved again.
+                if checkpoints.reached('mix.lock') or not dependencies:
+                    reporter(_SKIP)
+                    return
+
+                # Mix needs actual files to work on. A previous run may have updated the lockfile
+                # and failed before committing it, that change is committed below.
+                worktree = vcs.worktree(branch, ensure_clean=False)
+                location = worktree.project_location(project)
+                if worktree.is_dirty(ignore=[mix_lock(location)]):
+                    fatal(f'The worktree {worktree.location} has uncommitted changes.',
+                          'Please commit or purge them before proceeding with changes.')
+
+                if mix(['deps.update', *(dep.name for dep in dependencies)], location,
+                       check=False).returncode == 0 \
                     or confirm('There was an error updating dependencies, that will have to be resolved manually. Continue anyway?'):
-                    if project.repo.vcs.is_changed(mix_lock(project)):
-                        project.repo.vcs.commit('update lockfile', [mix_lock(project)])
+                    if worktree.is_changed(mix_lock(location)):
+                        worktree.commit('update lockfile', [mix_lock(location)])
+                    checkpoints.mark('mix.lock')
                 else:
                     fatal('Error updating lockfile')
 
-    def publish(self, project: ProjectHandle) -> bool:
+    def check_publish(self, project: ProjectHandle) -> List[str]:
+        if not os.getenv('HEX_API_KEY'):
+            return ['The HEX_API_KEY environment variable is not set.']
+
+        return []
+
+    def is_available(self, package: str, version: Version) -> bool:
+        return is_resolvable(package, version)
+
+    def dry_run_publish(self, project: ProjectHandle, vcs: Optional[Vcs] = None):
         if not os.getenv('HEX_API_KEY'):
             warn('The HEX_API_KEY environment variable seems not to be set.',
                  'Mix will probably be unable to authenticate and will fail.',
                  'To generate API key, run this command: mix hex.user key generate')
 
+        if vcs is None:
+            vcs = project.repo.vcs
+
+        location = vcs.project_location(project)
+
         with operation('Dry run'):
-            popen(['mix', 'deps.get'], log_stdout=True, cwd=project.location)
-            popen(['mix', 'hex.publish', '--yes', '--dry-run'], log_stdout=True,
-                  cwd=project.location)
+            mix(['deps.get'], location)
+            mix(['hex.publish', '--yes', '--dry-run'], location)
+
+    def publish(self, project: ProjectHandle, vcs: Optional[Vcs] = None) -> bool:
+        if vcs is None:
+            vcs = project.repo.vcs
 
-        if not confirm('Please review dry run logs, proceed'):
-            return False
+        location = vcs.project_location(project)
 
         with operation('Publishing for real'):
             if Manifest.open().allow_replace_on_publish:
-                proc = popen(['mix', 'hex.publish', '--yes', '--replace'], log_stdout=True, cwd=project.location)
+                proc = mix(['hex.publish', '--yes', '--replace'], location)
             else:
-                proc = popen(['mix', 'hex.publish', '--yes'], log_stdout=True, cwd=project.location)
+                proc = mix(['hex.publish', '--yes'], location)
 
             # https://github.com/hexpm/hex/blob/3362c4abea51525d6c435ebb30bacfa603e0213a/lib/mix/tasks/hex.publish.ex#L536
             if 'Package published to ' in proc.stdout:
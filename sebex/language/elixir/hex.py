@@ -0,0 +1,62 @@
+import gzip
+import os
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from sebex.analysis.version import Version
+
+_DEFAULT_REPOSITORY = 'https://repo.hex.pm'
+_TIMEOUT = 30
+
+
+def repository_url() -> str:
+    return os.getenv('HEX_MIRROR', _DEFAULT_REPOSITORY).rstrip('/')
+
+
+def is_resolvable(package: str, version: Version) -> bool:
+    """
+    Check whether given package release can already be fetched by Mix, i.e. whether both
+    the package tarball and the registry entry listing the release are served by the CDN.
+    """
+
+    return _has_tarball(package, version) and _registry_lists(package, version)
+
+
+def _has_tarball(package: str, version: Version) -> bool:
+    request = Request(f'{repository_url()}/tarballs/{package}-{version}.tar', method='HEAD')
+    try:
+        with urlopen(request, timeout=_TIMEOUT):
+            return True
+    except HTTPError as e:
+        if e.code in (403, 404):
+            return False
+        raise
+
+
+def _registry_lists(package: str, version: Version) -> bool:
+    try:
+        with urlopen(f'{repository_url()}/packages/{package}', timeout=_TIMEOUT) as response:
+            registry = gzip.decompress(response.read())
+    except HTTPError as e:
+        if e.code in (403, 404):
+            return False
+        raise
+
+    return _contains_release(registry, version)
+
+
+def _contains_release(registry: bytes, version: Version) -> bool:
+    """
+    Look for release version in signed registry resource, without decoding Protocol Buffers.
+
+    Version is the first, length-delimited field of each release message, so it is encoded as
+    0x0A tag byte, followed by length and UTF-8 bytes of the version.
+
+    >>> _contains_release(b'\\x0a\\x051.0.0\\x12\\x00', Version.parse('1.0.0'))
+    True
+    >>> _contains_release(b'\\x0a\\x0510.0.0', Version.parse('0.0.0'))
+    False
+    """
+
+    version = str(version).encode('utf-8')
+    return b'\x0a' + bytes([len(version)]) + version in registry
@@ -1,3 +1,4 @@
+import threading
 from contextlib import contextmanager
 from contextvars import ContextVar
 from itertools import chain
@@ -6,13 +7,29 @@ from typing import NoReturn, Optional, List
 import click
 
 _logcontext_var = ContextVar('sebex_logcontext')
+_logbuffer_var = ContextVar('sebex_logbuffer')
+
+# Serializes writes to the terminal, so that lines and buffered blocks of concurrent jobs
+# do not interleave.
+_echo_lock = threading.RLock()
 
 
 def log(*msg, color=None):
-    click.echo(' '.join(chain(
-        (click.style(f'[{c}]', fg='bright_black') for c in _logcontext_var.get([])),
+    line = ' '.join(chain(
+        (prefix(),) if _logcontext_var.get([]) else (),
         (click.style(str(m), fg=color) for m in msg)
-    )))
+    ))
+
+    buffer: Optional[List[str]] = _logbuffer_var.get(None)
+    if buffer is not None:
+        buffer.append(line)
+    else:
+        with _echo_lock:
+            click.echo(line)
+
+
+def prefix() -> str:
+    return ' '.join(click.style(f'[{c}]', fg='bright_black') for c in _logcontext_var.get([]))
 
 
 def success(*msg):
@@ -62,3 +79,66 @@ def logcontext(ctx: str):
         yield None
     finally:
         _logcontext_var.reset(token)
+
+
+def current_logcontext() -> Optional[str]:
+    """Get the innermost log context, if any."""
+    lst: List[str] = _logcontext_var.get([])
+    return lst[-1] if lst else None
+
+
+@contextmanager
+def logbuffer():
+    """
+    Collect all log lines emitted within this context and print them as a single block
+    when it is left (or when the buffer is flushed explicitly).
+    """
+    token = _logbuffer_var.set([])
+    try:
+        yield None
+    finally:
+        flush_logbuffer()
+        _logbuffer_var.reset(token)
+
+
+def flush_logbuffer():
+    buffer: Optional[List[str]] = _logbuffer_var.get(None)
+    if buffer:
+        with _echo_lock:
+            for line in buffer:
+                click.echo(line)
+        buffer.clear()
+
+
+@contextmanager
+def terminal():
+    """Acquire exclusive access to the terminal, e.g. for interactive prompts."""
+    with _echo_lock:
+        flush_logbuffer()
+        yield None
+
+
+def table(headers: List[str], rows: List[List[str]]) -> str:
+    """
+    Format rows of (possibly styled) cells into aligned columns.
+
+    >>> print(click.unstyle(table(['A', 'Long'], [['xyz', '1']])))
+    A    Long
+    ---  ----
+    xyz  1
+    """
+
+    widths = [len(click.unstyle(h)) for h in headers]
+    for row in rows:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], len(click.unstyle(cell)))
+
+    def line(cells: List[str]) -> str:
+        padded = (cell + ' ' * (w - len(click.unstyle(cell))) for cell, w in zip(cells, widths))
+        return '  '.join(padded).rstrip()
+
+    return '\n'.join([
+        line([click.style(h, bold=True) for h in headers]),
+        line(['-' * w for w in widths]),
+        *(line(row) for row in rows),
+    ])
@@ -0,0 +1,135 @@
+"""
+Host-wide cache of bare mirrors of remote repositories, shared by many workspaces.
+
+Workspace clones borrow objects from mirrors (through Git alternates), and their fetches are
+redirected to mirrors with `url.<mirror>.insteadOf`, while pushes still go to the remote.
+Each fetch updates the mirror first, so the mirror is the only clone talking to the remote,
+and new workspaces are created from local disk.
+"""
+
+import fcntl
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import click
+from git import Repo
+
+from sebex.config.manifest import RepositoryHandle
+from sebex.log import operation
+from sebex.ssh import connection, remote_host, remote_path
+
+
+def mirror_location(cache: Path, url: str) -> Path:
+    """
+    Get location of the mirror of given remote in the cache.
+
+    >>> mirror_location(Path('/cache'), 'git@github.com:membraneframework/sebex.git')
+    PosixPath('/cache/github.com/membraneframework/sebex.git')
+    >>> mirror_location(Path('/cache'), 'https://github.com/membraneframework/sebex')
+    PosixPath('/cache/github.com/membraneframework/sebex.git')
+    >>> mirror_location(Path('/cache'), '/srv/git/sebex.git')
+    PosixPath('/cache/local/srv/git/sebex.git')
+    """
+
+    path = remote_path(url).strip('/')
+    if not path.endswith('.git'):
+        path += '.git'
+
+    return cache / (remote_host(url) or 'local') / path
+
+
+def update(mirror: Path, url: str, repo: RepositoryHandle):
+    """
+    Create or update mirror of given remote.
+
+    Mirrors may be shared by concurrently running Sebex processes, so they are guarded by
+    advisory file locks. Fetching is skipped if remote branches and tags did not move.
+    """
+
+    from sebex.vcs import _parse_ref_tips
+
+    mirror.parent.mkdir(parents=True, exist_ok=True)
+
+    with _locked(mirror), connection(url) as env:
+        if not mirror.exists():
+            with operation('Creating mirror of', repo):
+                git = Repo.clone_from(url, mirror, env=env, mirror=True).git
+                # Workspace clones may reference objects which are no longer reachable in
+                # the mirror, like commits of deleted branches, these must never be pruned.
+                git.config('gc.pruneExpire', 'never')
+                git.config('gc.reflogExpireUnreachable', 'never')
+            return
+
+        with operation('Updating mirror of', repo) as reporter:
+            git = Repo(mirror).git
+            with git.custom_environment(**env):
+                remote = _parse_ref_tips(git.ls_remote('--heads', '--tags', url))
+                local = _parse_ref_tips(git.for_each_ref('--format=%(objectname)%09%(refname)',
+                                                         'refs/heads/', 'refs/tags/'))
+                if remote == local:
+                    reporter(click.style('UNCHANGED', fg='green'))
+                    return
+
+                git.fetch('--prune', 'origin')
+
+
+def clone_options(mirror: Path, url: str) -> Dict[str, Any]:
+    """Keyword arguments for `git clone` of given remote, borrowing objects from the mirror."""
+    return {
+        'reference': str(mirror),
+        'config': redirect_config(mirror, url),
+        # GitPython refuses passing --config unless told it is intended.
+        'allow_unsafe_options': True,
+    }
+
+
+def redirect_config(mirror: Path, url: str) -> List[str]:
+    """
+    Git configuration making fetches from given remote go to the mirror, but not pushes.
+
+    >>> redirect_config(Path('/cache/x.git'), 'git@x:x.git')
+    ['url./cache/x.git.insteadOf=git@x:x.git', 'url.git@x:x.git.pushInsteadOf=git@x:x.git']
+    """
+
+    return [
+        f'url.{mirror}.insteadOf={url}',
+        f'url.{url}.pushInsteadOf={url}',
+    ]
+
+
+def redirected_mirror(config: str, url: str) -> Optional[Path]:
+    """
+    Find the mirror which fetches of given remote are redirected to by `redirect_config`, given
+    output of `git config --get-regexp ^url\\.`. URL rewrites configured by others are ignored.
+
+    >>> redirected_mirror('url./cache/x.git.insteadof git@x:x.git\\n'
+    ...                   'url.git@x:x.git.pushinsteadof git@x:x.git', 'git@x:x.git')
+    PosixPath('/cache/x.git')
+    >>> redirected_mirror('url.https://token@x/.insteadof git@x:x.git', 'git@x:x.git') is None
+    True
+    """
+
+    # Section and variable names are printed lowercase, subsections as they are.
+    entries = {tuple(line.split(' ', 1)) for line in config.splitlines() if ' ' in line}
+    if (f'url.{url}.pushinsteadof', url) not in entries:
+        return None
+
+    for key, value in entries:
+        if value == url and key.startswith('url.') and key.endswith('.insteadof') \
+                and not key.endswith('.pushinsteadof'):
+            base = Path(key[len('url.'):-len('.insteadof')])
+            if base.is_absolute():
+                return base
+
+    return None
+
+
+@contextmanager
+def _locked(mirror: Path):
+    with open(mirror.with_name(mirror.name + '.lock'), 'w') as fp:
+        fcntl.flock(fp, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
@@ -0,0 +1,39 @@
+import random
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Backoff:
+    """
+    Exponentially growing delays between consecutive polls of a slowly changing resource.
+
+    >>> backoff = Backoff(initial=1, maximum=5, jitter=0)
+    >>> [backoff.next() for _ in range(5)]
+    [1, 2, 4, 5, 5]
+    >>> backoff.reset()
+    >>> backoff.next()
+    1
+    """
+
+    initial: float = 10
+    maximum: float = 300
+    factor: float = 2
+    # Relative random spread of delays, prevents concurrent pollers from running in lockstep.
+    jitter: float = 0.1
+
+    _current: float = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.reset()
+
+    def reset(self):
+        self._current = self.initial
+
+    def next(self) -> float:
+        delay = self._current
+        self._current = min(self._current * self.factor, self.maximum)
+
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+
+        return delay
@@ -1,9 +1,20 @@
 import subprocess
+import threading
 from os import PathLike
 from typing import List, Union
 
 from sebex.log import logcontext, log, warn, error
 
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def generation() -> int:
+    """
+    Number of external commands run so far. Any files may have changed since it was last read.
+    """
+    return _generation
+
 
 def popen(args: Union[str, PathLike, List[str]], log_stdout: bool = False, check = True,
           **kwargs) -> subprocess.CompletedProcess:
@@ -14,6 +25,10 @@ def popen(args: Union[str, PathLike, List[str]], log_stdout: bool = False, check
 
     lc = str(lc)[:12]
 
+    # Files may change at any moment while the command runs, so states read meanwhile are
+    # outdated once it finishes, too.
+    _advance_generation()
+
     with logcontext(lc):
         try:
             proc = subprocess.run(args, stdin=subprocess.DEVNULL, capture_output=True,
@@ -34,3 +49,11 @@ def popen(args: Union[str, PathLike, List[str]], log_stdout: bool = False, check
                     error(line)
 
             raise
+        finally:
+            _advance_generation()
+
+
+def _advance_generation():
+    global _generation
+    with _generation_lock:
+        _generation += 1
@@ -1,6 +1,10 @@
-from typing import List, Type
+import time
+from collections import defaultdict
+from typing import List, Type, Callable
 
-from sebex.log import operation, logcontext
+from sebex.jobs import for_each, pipeline
+from sebex.log import operation, logcontext, logbuffer, log, error
+from sebex.poll import Backoff
 from sebex.release.executor.cleanup import Cleanup
 from sebex.release.executor.close_release_branch import CloseReleaseBranch
 from sebex.release.executor.create_github_release import CreateGithubRelease
@@ -8,7 +12,8 @@ from sebex.release.executor.merge_pull_request import MergePullRequest
 from sebex.release.executor.open_pull_request import OpenPullRequest
 from sebex.release.executor.open_release_branch import OpenReleaseBranch
 from sebex.release.executor.publish_package import PublishPackage
-from sebex.release.executor.types import Action, Task
+from sebex.release.executor.types import Action, Task, NOT_PREFETCHED
+from sebex.release.git import find_release_pull_request, PullRequestPoller
 from sebex.release.state import ProjectState, ReleaseState, ReleaseStage
 
 _ALL_TASK_TYPES: List[Type[Task]] = [
@@ -22,6 +27,12 @@ _ALL_TASK_TYPES: List[Type[Task]] = [
 ]
 
 
+# Drives single project up to given stage.
+_Driver = Callable[[ReleaseState, ProjectState, ReleaseStage], Action]
+
+_BEFORE_PUBLISHING = ReleaseStage.CREATE_GITHUB_RELEASE
+
+
 def get_task_by_stage(stage: ReleaseStage) -> Type[Task]:
     for job in _ALL_TASK_TYPES:
         if job.stage() == stage:
@@ -30,41 +41,210 @@ def get_task_by_stage(stage: ReleaseStage) -> Type[Task]:
         raise ValueError(f'Stage {stage} cannot be reached by any task.')
 
 
-def plan(release: ReleaseState) -> List[Task]:
+def plan(release: ReleaseState, pipelined: bool = False) -> List[Task]:
     def do_plan():
-        for proj in _get_current_subset(release):
+        for proj in upcoming(release, pipelined):
             klass = get_task_by_stage(proj.stage.next)
             yield klass(project=proj)
 
     return list(do_plan())
 
 
-def proceed(release: ReleaseState) -> Action:
-    hit_breakpoint = False
+def upcoming(release: ReleaseState, pipelined: bool = False) -> List[ProjectState]:
+    """List projects which would be driven by `proceed` or `watch`."""
+    if pipelined:
+        return _get_ready_subset(release)
+    else:
+        return _get_current_subset(release)
+
 
-    for proj in _get_current_subset(release):
-        with logcontext(str(proj.project)):
-            for next_stage in proj.stage:
-                klass = get_task_by_stage(next_stage)
-                task: Task = klass(project=proj)
-
-                with operation(task.human_name) as reporter:
-                    action = task.run(release)
-                    reporter(action.report())
-
-                    if action in (Action.PROCEED, Action.SKIP):
-                        proj.stage = next_stage
-                    elif action == Action.BREAKPOINT:
-                        hit_breakpoint = True
-                        break
-                    elif action == Action.FINISH:
-                        break
-
-    if hit_breakpoint:
+def proceed(release: ReleaseState, pipelined: bool = False) -> Action:
+    """
+    Drive all projects of the current phase as far as possible.
+
+    Projects within a phase are independent of each other, so they are processed concurrently.
+    Each project is changed in its own worktree, so this applies to projects sharing
+    a repository too.
+
+    Packages of a phase are published in one batch: dry runs of all of them are run concurrently
+    and reviewed at once, before publishing them for real.
+
+    In pipelined mode, phases are not treated as barriers. Instead, each project is started as
+    soon as all projects it depends on are released, and is published on its own.
+    """
+
+    return _drive(release, pipelined, _proceed_project)
+
+
+def watch(release: ReleaseState, pipelined: bool = False,
+          backoff: Callable[[], Backoff] = Backoff) -> Action:
+    """
+    Like `proceed`, but instead of stopping at pull requests awaiting merge, keep polling them
+    and advance each project as soon as its pull request can be merged.
+    """
+
+    def do_watch(release: ReleaseState, proj: ProjectState, until: ReleaseStage) -> Action:
+        return _watch_project(release, proj, until, backoff())
+
+    return _drive(release, pipelined, do_watch)
+
+
+def _drive(release: ReleaseState, pipelined: bool, driver: _Driver) -> Action:
+    if pipelined:
+        return _drive_pipelined(release, driver)
+
+    projects = _get_current_subset(release)
+    _prefetch(release, projects)
+
+    # Stop all projects before publishing, so that packages of the whole phase can be reviewed
+    # and published in one batch.
+    actions = for_each(projects,
+                       lambda proj: driver(release, proj, _BEFORE_PUBLISHING),
+                       desc='Releasing', item_desc=lambda p: p.project)
+
+    waiting = [p for p, a in zip(projects, actions) if a == Action.PROCEED]
+    # Projects published on an earlier run (e.g. stopped at cleanup) must not be published again.
+    to_publish = [p for p in waiting if p.publish and p.stage < ReleaseStage.PUBLISHED]
+
+    def on_published(proj: ProjectState):
+        _advance(release, proj, ReleaseStage.PUBLISHED)
+
+    if to_publish:
+        PublishPackage.publish_batch(release, to_publish, on_published)
+
+    if any(p.stage < ReleaseStage.PUBLISHED for p in to_publish):
+        actions.append(Action.BREAKPOINT)
+
+    actions.extend(for_each([p for p in waiting if p not in to_publish or
+                             p.stage >= ReleaseStage.PUBLISHED],
+                            lambda proj: driver(release, proj, ReleaseStage.DONE),
+                            desc='Releasing', item_desc=lambda p: p.project))
+
+    if any(a == Action.BREAKPOINT for a in actions):
         return Action.BREAKPOINT
     else:
         return Action.FINISH
 
 
+def _drive_pipelined(release: ReleaseState, driver: _Driver) -> Action:
+    _prefetch(release, _get_ready_subset(release))
+
+    results = pipeline(_get_unfinished(release),
+                       lambda proj: driver(release, proj, ReleaseStage.DONE),
+                       is_ready=lambda p: _is_ready(release, p),
+                       desc='Releasing', item_desc=lambda p: p.project)
+
+    if any(a == Action.BREAKPOINT for _, a in results) or not release.is_done():
+        return Action.BREAKPOINT
+    else:
+        return Action.FINISH
+
+
+def _prefetch(release: ReleaseState, projects: List[ProjectState]):
+    """Let tasks about to run for many projects batch their queries."""
+
+    # Data prefetched by earlier runs may be stale already.
+    release.prefetched.clear()
+
+    by_task = defaultdict(list)
+    for proj in projects:
+        by_task[get_task_by_stage(proj.stage.next)].append(proj)
+
+    for klass, task_projects in by_task.items():
+        for project, data in klass.prefetch(release, task_projects).items():
+            release.prefetched[(klass.stage(), project)] = data
+
+
+def _proceed_project(release: ReleaseState, proj: ProjectState,
+                     until: ReleaseStage = ReleaseStage.DONE) -> Action:
+    """
+    Drive project through stages up to `until`. Returns `Action.PROCEED` if the project has
+    stopped there, but could go further.
+    """
+
+    with logcontext(str(proj.project)), logbuffer():
+        for next_stage in proj.stage:
+            if next_stage > until:
+                return Action.PROCEED
+
+            klass = get_task_by_stage(next_stage)
+            # Prefetched data is used once, e.g. watching queries pull requests anew.
+            task: Task = klass(project=proj, prefetched=release.prefetched.pop(
+                (next_stage, proj.project), NOT_PREFETCHED))
+
+            with operation(task.human_name) as reporter:
+                action = task.run(release)
+                reporter(action.report())
+
+                if action in (Action.PROCEED, Action.SKIP):
+                    _advance(release, proj, next_stage)
+                elif action in (Action.BREAKPOINT, Action.FINISH):
+                    return action
+
+    return Action.FINISH
+
+
+def _advance(release: ReleaseState, proj: ProjectState, stage: ReleaseStage):
+    proj.stage = stage
+    proj.checkpoints = []
+    # Save progress after each transition, so nothing is lost if other jobs fail.
+    release.save()
+
+
+def _watch_project(release: ReleaseState, proj: ProjectState, until: ReleaseStage,
+                   backoff: Backoff) -> Action:
+    poller = None
+
+    while True:
+        action = _proceed_project(release, proj, until)
+
+        # Only waiting for pull request merge can resolve itself, other breakpoints need
+        # a human to step in.
+        if action != Action.BREAKPOINT or proj.stage.next != ReleaseStage.PULL_REQUEST_MERGED:
+            return action
+
+        with logcontext(str(proj.project)):
+            if poller is None:
+                pr = find_release_pull_request(proj, state='all')
+                if pr is None:
+                    error('Release pull request not found, cannot watch it for changes.')
+                    return action
+
+                poller = PullRequestPoller(pr)
+
+            if poller.closed:
+                return action
+
+            while True:
+                delay = backoff.next()
+                log(f'Waiting {delay:.0f}s for pull request changes...')
+                time.sleep(delay)
+
+                if poller.changed():
+                    backoff.reset()
+                    break
+
+
+def _is_ready(release: ReleaseState, proj: ProjectState) -> bool:
+    return all(_is_released(dep) for dep in release.dependencies_of(proj))
+
+
+def _is_released(proj: ProjectState) -> bool:
+    """Check whether dependents of given project can already be released."""
+    if proj.publish:
+        # Dependents resolve new version from Hex, so the rest of the release is irrelevant.
+        return proj.stage >= ReleaseStage.PUBLISHED
+    else:
+        return proj.stage == ReleaseStage.DONE
+
+
 def _get_current_subset(rel: ReleaseState) -> List[ProjectState]:
     return [p for p in rel.current_phase() if p.stage != ReleaseStage.DONE]
+
+
+def _get_unfinished(rel: ReleaseState) -> List[ProjectState]:
+    return [p for phase in rel.phases for p in phase if p.stage != ReleaseStage.DONE]
+
+
+def _get_ready_subset(rel: ReleaseState) -> List[ProjectState]:
+    return [p for p in _get_unfinished(rel) if _is_ready(rel, p)]
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 
 from sebex.release.executor.types import Task, Action
+from sebex.release.git import release_tag_name
 from sebex.release.state import ReleaseStage, ReleaseState
 
 
@@ -11,4 +12,7 @@ class Cleanup(Task):
         return ReleaseStage.DONE
 
     def run(self, release: ReleaseState) -> Action:
+        if self.project.publish:
+            self.project.project.repo.vcs.remove_worktree(release_tag_name(self.project))
+
         return Action.PROCEED
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 
+from sebex.checkpoint import Checkpoints
 from sebex.release.executor.types import Task, Action
 from sebex.release.git import release_branch_name, release_tag_name
 from sebex.release.state import ReleaseStage, ReleaseState
@@ -16,14 +17,19 @@ class CloseReleaseBranch(Task):
         tag = release_tag_name(self.project)
         vcs = self.project.project.repo.vcs
 
-        vcs.checkout(vcs.default_branch)
-        vcs.fetch()
-        vcs.pull()
+        checkpoints = Checkpoints(self.project.checkpoints, on_change=release.save)
 
-        vcs.delete_remote_branch(branch)
-        vcs.delete_local_branch(branch)
+        # The merge commit only has to be fetched, there is no need to check it out
+        # in the main clone just for tagging it.
+        if not checkpoints.reached('tagged'):
+            vcs.fetch()
+            vcs.remove_worktree(branch)
+            vcs.delete_local_branch(branch, force=True)
 
-        vcs.tag(tag)
-        vcs.push(tag=tag)
+            vcs.tag(tag, ref=f'{vcs.default_remote}/{vcs.default_branch}')
+            # If pushing fails, the tag is pushed as it is when retrying.
+            checkpoints.mark('tagged')
+
+        vcs.push_atomic(delete_branches=[branch], tags=[tag])
 
         return Action.PROCEED
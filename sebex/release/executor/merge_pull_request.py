@@ -1,14 +1,13 @@
 from dataclasses import dataclass
-
-from github import Repository as GithubRepository
-from github.PullRequest import PullRequest
+from typing import List, Dict, Optional
 
 from sebex.cli import confirm
-from sebex.config.manifest import Manifest
+from sebex.config.manifest import ProjectHandle
 from sebex.log import success, error, log
-from sebex.release.executor.types import Task, Action
-from sebex.release.git import find_release_pull_request
-from sebex.release.state import ReleaseStage, ReleaseState
+from sebex.release.executor.types import Task, Action, NOT_PREFETCHED
+from sebex.release.git import PullRequestStatus, fetch_release_pull_requests, \
+    fetch_release_pull_request
+from sebex.release.state import ReleaseStage, ReleaseState, ProjectState
 
 
 @dataclass
@@ -17,10 +16,17 @@ class MergePullRequest(Task):
     def stage(cls) -> ReleaseStage:
         return ReleaseStage.PULL_REQUEST_MERGED
 
+    @classmethod
+    def prefetch(cls, release: ReleaseState,
+                 projects: List[ProjectState]) -> Dict[ProjectHandle, Optional[PullRequestStatus]]:
+        return fetch_release_pull_requests(projects)
+
     def run(self, release: ReleaseState) -> Action:
-        manifest = Manifest.open().get_repository_by_name(self.project.project.repo)
-        github = manifest.github
-        pr = find_release_pull_request(self.project, state='all')
+        if self.prefetched is NOT_PREFETCHED:
+            pr = fetch_release_pull_request(self.project)
+        else:
+            pr = self.prefetched
+
         if pr is None:
             raise AssertionError('At this stage, the pull request should already exist.')
 
@@ -33,9 +39,10 @@ class MergePullRequest(Task):
                   'It needs to be reopened and merged in order to proceed further:', pr.html_url)
             return Action.BREAKPOINT
 
-        if self.can_auto_merge(github, pr):
+        if self.can_auto_merge(pr):
             if confirm(f'Pull request #{pr.number} can be merged, merge automatically?'):
-                result = pr.merge()
+                github = self.project.project.repo.vcs.github
+                result = github.get_pull(pr.number).merge()
                 if result.merged:
                     success(f'Merged #{pr.number}.')
                     return Action.PROCEED
@@ -46,24 +53,19 @@ class MergePullRequest(Task):
         return Action.BREAKPOINT
 
     @classmethod
-    def can_auto_merge(cls, repo: GithubRepository, pr: PullRequest):
+    def can_auto_merge(cls, pr: PullRequestStatus) -> bool:
         if not pr.mergeable:
             return False
 
-        status = repo.get_commit(pr.head.sha).get_combined_status()
-        if status.state in ('failure', 'error'):
-            log('Following statuses failed:',
-                ', '.join(s.context for s in status.statuses if s.state in ('failure', 'error')))
+        if pr.failed_checks:
+            log('Following statuses failed:', ', '.join(pr.failed_checks))
             return False
-        elif status.state == 'pending' and status.statuses:
-            log('Waiting for following statuses:',
-                ', '.join(s.context for s in status.statuses if s.state == 'pending'))
+        elif pr.pending_checks:
+            log('Waiting for following statuses:', ', '.join(pr.pending_checks))
             return False
 
-        changes_requested = {review.user.login: review.state == 'CHANGES_REQUESTED'
-                             for review in pr.get_reviews()}
-        if any(changes_requested.values()):
-            log('Changes requested by:', ', '.join(u for u, s in changes_requested.items() if s))
+        if pr.changes_requested_by:
+            log('Changes requested by:', ', '.join(pr.changes_requested_by))
             return False
 
         return True
@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 
+from sebex.checkpoint import Checkpoints
 from sebex.language import language_support_for
-from sebex.log import operation
+from sebex.log import operation, log
 from sebex.release.executor.types import Task, Action
 from sebex.release.git import release_branch_name
 from sebex.release.state import ReleaseStage, ReleaseState
@@ -15,15 +16,30 @@ class OpenReleaseBranch(Task):
 
     def run(self, release: ReleaseState) -> Action:
         branch_name = release_branch_name(self.project)
+        checkpoints = Checkpoints(self.project.checkpoints, on_change=release.save)
 
-        self.project.project.repo.vcs.checkout(branch_name, delete_existing=True)
+        # Changes are committed directly to the branch, so that the main clone stays intact
+        # and multiple projects of one repository can be released concurrently.
+        vcs = self.project.project.repo.vcs
+
+        if checkpoints:
+            # Some changes have already been committed by previous run, so keep the branch.
+            log('Resuming changes on branch', branch_name)
+        else:
+            # Start from the remote default branch, the local one may lag behind it.
+            vcs.fetch()
+            vcs.create_branch(branch_name, f'{vcs.default_remote}/{vcs.default_branch}',
+                              delete_existing=True)
 
         with operation('Modifying project files'):
             language_support_for(self.project.language).write_release(
                 self.project.project,
+                branch_name,
                 self.project.to_version,
                 self.project.version_span,
                 self.project.dependency_updates,
+                checkpoints,
+                vcs=vcs,
             )
 
         return Action.PROCEED
@@ -1,8 +1,21 @@
+import time
 from dataclasses import dataclass
+from typing import List, Callable
 
+import click
+
+from sebex.checkpoint import Checkpoints
+from sebex.cli import confirm
+from sebex.jobs import for_each
 from sebex.language import language_support_for
+from sebex.log import logcontext, logbuffer, operation, warn, error
+from sebex.poll import Backoff
 from sebex.release.executor.types import Task, Action
-from sebex.release.state import ReleaseStage, ReleaseState
+from sebex.release.git import release_tag_name
+from sebex.release.state import ReleaseStage, ReleaseState, ProjectState
+
+# How long to wait for published package to become available to dependents.
+_PROPAGATION_TIMEOUT = 15 * 60
 
 
 @dataclass
@@ -15,7 +28,100 @@ class PublishPackage(Task):
         if not self.project.publish:
             return Action.SKIP
 
-        if language_support_for(self.project.language).publish(self.project.project):
+        checkpoints = Checkpoints(self.project.checkpoints, on_change=release.save)
+
+        if not checkpoints.reached('uploaded'):
+            # Publish exactly the tagged revision, regardless of what is checked out
+            # in the main clone.
+            worktree = self.project.project.repo.vcs.worktree(release_tag_name(self.project))
+            support = language_support_for(self.project.language)
+
+            support.dry_run_publish(self.project.project, vcs=worktree)
+
+            if not confirm('Please review dry run logs, proceed'):
+                return Action.BREAKPOINT
+
+            if not support.publish(self.project.project, vcs=worktree):
+                return Action.BREAKPOINT
+
+            checkpoints.mark('uploaded')
+
+        if self.wait_until_available(self.project):
             return Action.PROCEED
         else:
             return Action.BREAKPOINT
+
+    @classmethod
+    def publish_batch(cls, release: ReleaseState, projects: List[ProjectState],
+                      on_published: Callable[[ProjectState], None]):
+        """
+        Publish multiple packages at once: run all dry runs concurrently, let user review them
+        in one go, and then publish all packages concurrently.
+
+        Each published project is reported immediately, so that it is not published again even
+        if publishing of other ones fails.
+        """
+
+        def checkpoints(proj: ProjectState) -> Checkpoints:
+            return Checkpoints(proj.checkpoints, on_change=release.save)
+
+        to_upload = [p for p in projects if not checkpoints(p).reached('uploaded')]
+
+        def dry_run(proj: ProjectState):
+            with logcontext(str(proj.project)), logbuffer():
+                worktree = proj.project.repo.vcs.worktree(release_tag_name(proj))
+                language_support_for(proj.language).dry_run_publish(proj.project, vcs=worktree)
+
+        if to_upload:
+            for_each(to_upload, dry_run, desc='Publish dry run', item_desc=lambda p: p.project)
+
+            if not confirm(f'Please review dry run logs of '
+                           f'{", ".join(str(p.project) for p in to_upload)}, '
+                           'publish all of them'):
+                return
+
+        def publish(proj: ProjectState):
+            with logcontext(str(proj.project)), logbuffer():
+                if proj in to_upload:
+                    worktree = proj.project.repo.vcs.worktree(release_tag_name(proj))
+                    if not language_support_for(proj.language).publish(proj.project,
+                                                                       vcs=worktree):
+                        return
+
+                    checkpoints(proj).mark('uploaded')
+
+                if cls.wait_until_available(proj):
+                    on_published(proj)
+
+        for_each(projects, publish, desc='Publishing', item_desc=lambda p: p.project)
+
+    @classmethod
+    def wait_until_available(cls, proj: ProjectState) -> bool:
+        """
+        Wait until published package can be fetched by dependents, as package registries
+        and their CDNs may need a while to catch up.
+        """
+
+        if proj.package is None:
+            warn('Package name is unknown, not waiting for the package to become available.')
+            return True
+
+        support = language_support_for(proj.language)
+        backoff = Backoff(initial=5, maximum=60)
+        deadline = time.monotonic() + _PROPAGATION_TIMEOUT
+
+        with operation(f'Waiting for {proj.package} {proj.to_version} to become available') \
+                as reporter:
+            while True:
+                try:
+                    if support.is_available(proj.package, proj.to_version):
+                        return True
+                except OSError as e:
+                    warn('Failed to check package availability:', e)
+
+                if time.monotonic() >= deadline:
+                    reporter(click.style('TIMED OUT', fg='yellow'))
+                    error('The package is still not available, try again later.')
+                    return False
+
+                time.sleep(backoff.next())
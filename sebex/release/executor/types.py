@@ -1,13 +1,17 @@
 import re
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import Optional
+from typing import Optional, List, Dict, Any
 
 import click
 
+from sebex.config.manifest import ProjectHandle
 from sebex.release.state import ProjectState, ReleaseStage, ReleaseState
 
+# Marks tasks with nothing prefetched for them, as `None` may be a valid prefetched value.
+NOT_PREFETCHED = object()
+
 
 class Action(Enum):
     PROCEED = auto()
@@ -31,6 +35,8 @@ class Action(Enum):
 @dataclass
 class Task(ABC):
     project: ProjectState
+    # What `prefetch` returned for this project during the current run, if anything.
+    prefetched: Any = field(default=NOT_PREFETCHED, compare=False, repr=False)
 
     @classmethod
     @abstractmethod
@@ -38,6 +44,17 @@ class Task(ABC):
         """The stage the project will enter after completing this task."""
         ...
 
+    @classmethod
+    def prefetch(cls, release: ReleaseState,
+                 projects: List[ProjectState]) -> Dict[ProjectHandle, Any]:
+        """
+        Prepare running this task for all given projects at once, before they are driven
+        concurrently. Tasks querying remote services may batch the queries here.
+
+        Returned data is passed to the task of each project as `prefetched`, once.
+        """
+        return {}
+
     @abstractmethod
     def run(self, release: ReleaseState) -> Action:
         """Execute this task and return action to perform after."""
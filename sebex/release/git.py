@@ -1,9 +1,44 @@
-from typing import Optional
+import json
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Tuple, List, Any, Iterable
 
 from github.PullRequest import PullRequest
 
+from sebex.config.manifest import ProjectHandle
+from sebex.log import warn
 from sebex.release.state import ProjectState
 
+# Pull requests queried at once. Each costs about two hundred nodes, far below GitHub's limits.
+_GRAPHQL_CHUNK = 25
+
+_PULL_REQUEST_FRAGMENT = '''
+fragment release on PullRequest {
+  number
+  url
+  state
+  mergeable
+  latestReviews(first: 100) { nodes { state author { login } } }
+  commits(last: 1) {
+    nodes {
+      commit {
+        statusCheckRollup {
+          contexts(first: 100) {
+            nodes {
+              __typename
+              ... on StatusContext { context state }
+              ... on CheckRun { name status conclusion }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+'''
+
+_FAILED_CHECK_CONCLUSIONS = {'FAILURE', 'TIMED_OUT', 'CANCELLED', 'ACTION_REQUIRED',
+                             'STARTUP_FAILURE'}
+
 
 def release_branch_name(project: ProjectState) -> str:
     return f'release/{release_tag_name(project)}'
@@ -20,3 +55,204 @@ def pull_request_title(project: ProjectState) -> str:
 def find_release_pull_request(project: ProjectState, **filters) -> Optional[PullRequest]:
     return project.project.repo.vcs.find_pull_request(branch=release_branch_name(project),
                                                       **filters)
+
+
+@dataclass(frozen=True)
+class PullRequestStatus:
+    """State of a pull request, checks of its head commit and its reviews, as of one query."""
+
+    number: int
+    html_url: str
+    # One of `open`, `closed` or `merged`.
+    state: str
+    # Unknown until GitHub computes it in the background.
+    mergeable: Optional[bool]
+    failed_checks: List[str] = field(default_factory=list)
+    pending_checks: List[str] = field(default_factory=list)
+    changes_requested_by: List[str] = field(default_factory=list)
+
+    @property
+    def merged(self) -> bool:
+        return self.state == 'merged'
+
+    @classmethod
+    def from_graphql(cls, node: Dict[str, Any]) -> 'PullRequestStatus':
+        """
+        >>> PullRequestStatus.from_graphql({
+        ...     'number': 1, 'url': 'u', 'state': 'OPEN', 'mergeable': 'MERGEABLE',
+        ...     'latestReviews': {'nodes': [{'state': 'CHANGES_REQUESTED',
+        ...                                  'author': {'login': 'alice'}}]},
+        ...     'commits': {'nodes': [{'commit': {'statusCheckRollup': {'contexts': {'nodes': [
+        ...         {'__typename': 'StatusContext', 'context': 'ci', 'state': 'FAILURE'},
+        ...         {'__typename': 'CheckRun', 'name': 'lint', 'status': 'IN_PROGRESS',
+        ...          'conclusion': None},
+        ...     ]}}}}]},
+        ... })
+        PullRequestStatus(number=1, html_url='u', state='open', mergeable=True, \
+failed_checks=['ci'], pending_checks=['lint'], changes_requested_by=['alice'])
+        """
+
+        failed, pending = [], []
+        for commit in node['commits']['nodes']:
+            rollup = commit['commit']['statusCheckRollup'] or {'contexts': {'nodes': []}}
+            for check in rollup['contexts']['nodes']:
+                if check['__typename'] == 'StatusContext':
+                    name, state = check['context'], check['state']
+                    if state in ('FAILURE', 'ERROR'):
+                        failed.append(name)
+                    elif state in ('PENDING', 'EXPECTED'):
+                        pending.append(name)
+                elif check['__typename'] == 'CheckRun':
+                    name = check['name']
+                    if check['status'] != 'COMPLETED':
+                        pending.append(name)
+                    elif check['conclusion'] in _FAILED_CHECK_CONCLUSIONS:
+                        failed.append(name)
+
+        return cls(
+            number=node['number'],
+            html_url=node['url'],
+            state=node['state'].lower(),
+            mergeable={'MERGEABLE': True, 'CONFLICTING': False}.get(node['mergeable']),
+            failed_checks=failed,
+            pending_checks=pending,
+            changes_requested_by=[review['author']['login']
+                                  for review in node['latestReviews']['nodes']
+                                  if review['state'] == 'CHANGES_REQUESTED' and review['author']],
+        )
+
+
+def fetch_release_pull_requests(
+        projects: Iterable[ProjectState]) -> Dict[ProjectHandle, Optional[PullRequestStatus]]:
+    """
+    Get status of the latest release pull request of each project, if there is any.
+
+    Instead of several REST requests per pull request, pull requests, their checks and reviews
+    are queried through GraphQL, many pull requests at once. Projects whose repositories
+    could not be queried (e.g. renamed ones) are left out, so that the rest is not affected.
+    """
+
+    projects = list(projects)
+
+    result = {}
+    for i in range(0, len(projects), _GRAPHQL_CHUNK):
+        result.update(_query_release_pull_requests(projects[i:i + _GRAPHQL_CHUNK]))
+
+    return result
+
+
+def _query_release_pull_requests(
+        projects: List[ProjectState]) -> Dict[ProjectHandle, Optional[PullRequestStatus]]:
+    parameters, selections, variables = [], [], {}
+    for i, proj in enumerate(projects):
+        vcs = proj.project.repo.vcs
+        owner, name = vcs.github_full_name.split('/', 1)
+        variables.update({f'owner{i}': owner, f'name{i}': name,
+                          f'head{i}': release_branch_name(proj), f'base{i}': vcs.default_branch})
+        parameters.append(f'$owner{i}: String!, $name{i}: String!, '
+                          f'$head{i}: String!, $base{i}: String!')
+        selections.append(
+            f'p{i}: repository(owner: $owner{i}, name: $name{i}) {{ '
+            f'pullRequests(headRefName: $head{i}, baseRefName: $base{i}, first: 1, '
+            f'orderBy: {{field: CREATED_AT, direction: DESC}}) {{ nodes {{ ...release }} }} }}')
+
+    query = (f'query({", ".join(parameters)}) {{\n' + '\n'.join(selections) + '\n}\n' +
+             _PULL_REQUEST_FRAGMENT)
+
+    requester = projects[0].project.repo.vcs.github._requester
+    _, response = requester.requestJsonAndCheck('POST', '/graphql',
+                                                input={'query': query, 'variables': variables})
+
+    data = response.get('data') or {}
+    result = {}
+    for i, proj in enumerate(projects):
+        repository = data.get(f'p{i}')
+        if repository is None:
+            errors = '; '.join(e.get('message', '') for e in response.get('errors', [])
+                               if e.get('path', [f'p{i}'])[0] == f'p{i}')
+            warn(f'Failed to query pull requests of {proj.project.repo}:', errors)
+            continue
+
+        nodes = repository['pullRequests']['nodes']
+        result[proj.project] = PullRequestStatus.from_graphql(nodes[0]) if nodes else None
+
+    return result
+
+
+def fetch_release_pull_request(project: ProjectState) -> Optional[PullRequestStatus]:
+    """
+    Get status of the latest release pull request of single project, if there is any.
+    Falls back to REST requests if the repository cannot be queried through GraphQL.
+    """
+
+    statuses = fetch_release_pull_requests([project])
+    if project.project in statuses:
+        return statuses[project.project]
+
+    pr = find_release_pull_request(project, state='all')
+    if pr is None:
+        return None
+
+    combined = project.project.repo.vcs.github.get_commit(pr.head.sha).get_combined_status()
+    # Only the latest review of each reviewer counts.
+    reviews = {review.user.login: review.state for review in pr.get_reviews()}
+
+    return PullRequestStatus(
+        number=pr.number,
+        html_url=pr.html_url,
+        state='merged' if pr.merged else pr.state,
+        mergeable=pr.mergeable,
+        failed_checks=[s.context for s in combined.statuses if s.state in ('failure', 'error')],
+        pending_checks=[s.context for s in combined.statuses if s.state == 'pending'],
+        changes_requested_by=[u for u, state in reviews.items() if state == 'CHANGES_REQUESTED'],
+    )
+
+
+class PullRequestPoller:
+    """
+    Cheaply detects changes of pull request, and of statuses and check runs of its head commit.
+
+    Resources are polled using conditional requests, and responses with
+    `304 Not Modified` status do not count against GitHub API rate limit.
+    """
+
+    def __init__(self, pr: PullRequest):
+        self._requester = pr._requester
+        self._pr_url = pr.url
+        self._repo_url = pr.base.repo.url
+        self._head_sha = pr.head.sha
+        self._etags: Dict[str, str] = {}
+        self.closed = False
+
+        # Remember current state of resources, so that the first check reports actual changes.
+        self.changed()
+
+    def changed(self) -> bool:
+        pr_changed, output = self._get(self._pr_url)
+        if pr_changed:
+            data = json.loads(output)
+            self._head_sha = data['head']['sha']
+            # Pull requests closed without merging will never change on their own.
+            self.closed = data.get('state') == 'closed' and not data.get('merged')
+
+        commit_url = f'{self._repo_url}/commits/{self._head_sha}'
+        status_changed, _ = self._get(f'{commit_url}/status')
+        # Checks of GitHub Actions are reported as check runs, not as statuses.
+        checks_changed, _ = self._get(f'{commit_url}/check-runs')
+
+        return pr_changed or status_changed or checks_changed
+
+    def _get(self, url: str) -> Tuple[bool, str]:
+        headers = {}
+        if url in self._etags:
+            headers['If-None-Match'] = self._etags[url]
+
+        status, response_headers, output = self._requester.requestJson('GET', url,
+                                                                       headers=headers)
+        if status == 304:
+            return False, output
+
+        if 'etag' in response_headers:
+            self._etags[url] = response_headers['etag']
+
+        return True, output
@@ -0,0 +1,84 @@
+import fcntl
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sebex.config.file import ConfigFile
+from sebex.config.manifest import ProjectHandle
+from sebex.release.state import ReleaseState
+
+
+class ReleaseLocks(ConfigFile):
+    """
+    Registry of projects claimed by pending releases.
+
+    Releases may run concurrently as long as their project sets are disjoint, this file is the
+    single source of truth about which release owns which project.
+    """
+
+    _name = 'locks'
+    _data = {
+        'releases': {},
+    }
+
+    @classmethod
+    @contextmanager
+    def exclusive(cls) -> Iterator['ReleaseLocks']:
+        """
+        Open the registry for modification, guarding it with an advisory file lock,
+        so that concurrently running Sebex processes do not override each other's changes.
+        """
+        lock_path = cls.format().full_path(cls._name).with_suffix('.lock')
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(lock_path, 'w') as fp:
+            fcntl.flock(fp, fcntl.LOCK_EX)
+            try:
+                with cls.open().transaction() as locks:
+                    yield locks
+            finally:
+                fcntl.flock(fp, fcntl.LOCK_UN)
+
+    def releases(self) -> List[str]:
+        return list(self._data['releases'].keys())
+
+    def owner(self, project: ProjectHandle) -> Optional[str]:
+        for release, projects in self._data['releases'].items():
+            if str(project) in projects:
+                return release
+
+        return None
+
+    def conflicts(self, release: str,
+                  projects: Iterable[ProjectHandle]) -> Dict[ProjectHandle, str]:
+        """
+        Find projects which are already claimed by other pending releases.
+
+        Locks of releases whose state files are gone are considered stale and are ignored.
+        """
+        result = {}
+
+        for project in projects:
+            owner = self.owner(project)
+            if owner is not None and owner != release and ReleaseState.exists(owner):
+                result[project] = owner
+
+        return result
+
+    def acquire(self, release: str, projects: Iterable[ProjectHandle]):
+        projects = list(projects)
+        conflicts = self.conflicts(release, projects)
+        if conflicts:
+            raise ValueError(f'Projects are already locked by other releases: '
+                             f'{", ".join(f"{p} ({r})" for p, r in conflicts.items())}')
+
+        # Drop stale claims of projects we are taking over.
+        for owner in self.releases():
+            self._data['releases'][owner] = [p for p in self._data['releases'][owner]
+                                             if ProjectHandle.parse(p) not in projects]
+            if not self._data['releases'][owner]:
+                del self._data['releases'][owner]
+
+        self._data['releases'][release] = sorted(str(p) for p in projects)
+
+    def release(self, release: str):
+        self._data['releases'].pop(release, None)
@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from typing import List
+
+import click
+
+from sebex.config.manifest import ProjectHandle
+from sebex.jobs import for_each
+from sebex.language import language_support_for
+from sebex.log import table
+from sebex.release.git import release_branch_name, release_tag_name, find_release_pull_request
+from sebex.release.state import ProjectState, ReleaseStage
+from sebex.vcs import Vcs
+
+
+@dataclass(frozen=True)
+class Blocker:
+    """A problem which would stop the release of a project somewhere in the middle."""
+
+    project: ProjectHandle
+    check: str
+    message: str
+
+
+def preflight(projects: List[ProjectState]) -> List[Blocker]:
+    """
+    Check all given projects concurrently for problems that would block their release,
+    so that all of them can be fixed at once, before proceeding.
+    """
+
+    results = for_each(projects, _check_project, desc='Preflight',
+                       item_desc=lambda p: p.project)
+    return [blocker for blockers in results for blocker in blockers]
+
+
+def describe_blockers(blockers: List[Blocker]) -> str:
+    rows = [[str(b.project), click.style(b.check, fg='red'), b.message]
+            for b in sorted(blockers, key=lambda b: (b.project, b.check))]
+    return table(['Project', 'Check', 'Problem'], rows)
+
+
+def _check_project(project: ProjectState) -> List[Blocker]:
+    blockers = []
+
+    def block(check: str, *msg):
+        blockers.append(Blocker(project.project, check, ' '.join(msg)))
+
+    repo = project.project.repo
+    if not repo.exists():
+        block('clone', 'Repository is not cloned, run `sebex sync`.')
+        return blockers
+
+    vcs = repo.vcs
+    branch = release_branch_name(project)
+    # Changes from previous attempts are expected when resuming from checkpoints.
+    starting = project.stage == ReleaseStage.CLEAN and not project.checkpoints
+
+    # Changes are made in a dedicated worktree, the main clone is not touched.
+    worktree = vcs.worktree_location(branch)
+    # Tasks resumed from checkpoints check for changes they may have left behind themselves.
+    if project.stage < ReleaseStage.BRANCH_CLOSED and not project.checkpoints \
+            and worktree.exists() and Vcs(repo, root=worktree).is_dirty():
+        block('clean', f'Worktree {worktree} has uncommitted changes.')
+
+    if starting:
+        tracking = vcs.tracking_branch(branch)
+        if tracking is not None:
+            block('branch', f'Branch {branch} already exists and tracks {tracking}.')
+
+        pr = find_release_pull_request(project)
+        if pr is not None:
+            block('pull request', f'Pull request is already open: {pr.html_url}')
+
+    # The tag may have already been created by a previous attempt to close the branch.
+    if project.stage < ReleaseStage.BRANCH_CLOSED and 'tagged' not in project.checkpoints:
+        tag = release_tag_name(project)
+        if vcs.tag_exists(tag):
+            block('tag', f'Tag {tag} already exists.')
+
+    if project.publish and project.stage < ReleaseStage.PUBLISHED:
+        for problem in language_support_for(project.language).check_publish(project.project):
+            block('publish', problem)
+
+    return blockers
@@ -0,0 +1,397 @@
+"""
+Offline simulation of release execution.
+
+The real executor and real tasks are run against in-memory fakes of Git, GitHub and package
+publishing, which only spend (scaled down) time drawn from configured latency distributions.
+Fakes replace factories of the real implementations only while the simulation runs.
+Nothing is changed on disk or remotely, so different release shapes and scheduling modes can be
+evaluated safely.
+"""
+
+import copy
+import random
+import threading
+import time
+from contextlib import contextmanager, ExitStack
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Any, Iterator
+
+from sebex import language
+from sebex.analysis.model import Language
+from sebex.config.manifest import RepositoryHandle, ProjectHandle
+from sebex.context import Context
+from sebex.log import current_logcontext, table
+from sebex.release import git as release_git
+from sebex.release.git import PullRequestStatus, release_branch_name
+from sebex.release.state import ReleaseState, ProjectState
+
+
+@dataclass(frozen=True)
+class Latency:
+    """
+    Normal distribution of durations (in seconds) of a simulated operation.
+
+    >>> Latency.parse('600:120')
+    Latency(mean=600.0, spread=120.0)
+    >>> Latency.parse('2')
+    Latency(mean=2.0, spread=0.0)
+    """
+
+    mean: float
+    spread: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        return max(0.0, rng.gauss(self.mean, self.spread))
+
+    @classmethod
+    def parse(cls, text: str) -> 'Latency':
+        mean, _, spread = text.partition(':')
+        return cls(float(mean), float(spread or 0))
+
+
+DEFAULT_LATENCIES: Dict[str, Latency] = {
+    # Local Git operations.
+    'git': Latency(0.1, 0.05),
+    'fetch': Latency(1, 0.5),
+    'push': Latency(2, 1),
+    # Single GitHub API request.
+    'github': Latency(0.5, 0.2),
+    # Time since opening pull request until CI statuses are reported.
+    'ci': Latency(600, 180),
+    'write': Latency(30, 10),
+    'dry-run': Latency(30, 10),
+    'publish': Latency(20, 5),
+    # Time since publishing until package is available through CDN.
+    'propagation': Latency(60, 30),
+}
+
+
+@dataclass(frozen=True)
+class Event:
+    project: str
+    operation: str
+    start: float
+    end: float
+
+
+@dataclass
+class SimulationReport:
+    events: List[Event]
+
+    @property
+    def duration(self) -> float:
+        return max((e.end for e in self.events), default=0.0)
+
+    @property
+    def max_parallelism(self) -> int:
+        """Maximum number of projects being worked on at the same time."""
+
+        # Operations of a single project never overlap, so it is enough to count operations.
+        points = sorted([(e.start, 1) for e in self.events] + [(e.end, -1) for e in self.events])
+
+        current = peak = 0
+        for _, delta in points:
+            current += delta
+            peak = max(peak, current)
+
+        return peak
+
+    def describe(self) -> str:
+        rows = [[e.project, e.operation, _format_time(e.start), _format_time(e.end)]
+                for e in sorted(self.events, key=lambda e: (e.start, e.project))]
+
+        return '\n'.join([
+            table(['Project', 'Operation', 'Start', 'End'], rows),
+            '',
+            f'Predicted duration: {_format_time(self.duration)}',
+            f'Maximum parallelism: {self.max_parallelism}',
+        ])
+
+
+def _format_time(seconds: float) -> str:
+    """
+    >>> _format_time(3725.4)
+    '1:02:05'
+    """
+    seconds = round(seconds)
+    return f'{seconds // 3600}:{seconds // 60 % 60:02}:{seconds % 60:02}'
+
+
+@dataclass
+class Simulation:
+    """
+    Shared clock, random source and event log of a single simulation run.
+
+    Simulated time passes `speedup` times faster than the real one.
+    """
+
+    latencies: Dict[str, Latency] = field(default_factory=lambda: dict(DEFAULT_LATENCIES))
+    speedup: float = 1000
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+        self._events: List[Event] = []
+        self._vcs: Dict[RepositoryHandle, SimulatedVcs] = {}
+        self._started = time.monotonic()
+
+    def now(self) -> float:
+        return (time.monotonic() - self._started) * self.speedup
+
+    def sample(self, operation: str) -> float:
+        with self._lock:
+            return self.latencies[operation].sample(self._rng)
+
+    def spend(self, operation: str, duration: Optional[float] = None):
+        """Block current job for a (sampled) duration of given operation and record it."""
+
+        if duration is None:
+            duration = self.sample(operation)
+
+        start = self.now()
+        time.sleep(duration / self.speedup)
+
+        with self._lock:
+            self._events.append(Event(current_logcontext() or '-', operation, start, self.now()))
+
+    def vcs(self, repo: RepositoryHandle) -> 'SimulatedVcs':
+        with self._lock:
+            if repo not in self._vcs:
+                self._vcs[repo] = SimulatedVcs(self, repo)
+            return self._vcs[repo]
+
+    def query_release_pull_requests(
+            self, projects: List[ProjectState]) -> Dict[ProjectHandle, Optional[PullRequestStatus]]:
+        self.spend('github')
+        return {p.project: p.project.repo.vcs.pull_request_status(release_branch_name(p))
+                for p in projects}
+
+    @contextmanager
+    def _installed(self) -> Iterator[None]:
+        """Replace factories of Git, GitHub and language support with ones creating fakes."""
+
+        with ExitStack() as stack:
+            stack.enter_context(_patched(RepositoryHandle, 'vcs', property(self.vcs)))
+            stack.enter_context(_patched(language, 'all_languages', lambda: [
+                _SimulatedLanguageSupport(self, lang) for lang in Language]))
+            stack.enter_context(_patched(release_git, '_query_release_pull_requests',
+                                         self.query_release_pull_requests))
+            yield
+
+    def run(self, release: ReleaseState, pipelined: bool = False) -> SimulationReport:
+        """Drive a copy of given release to the end."""
+
+        from sebex.release.executor import proceed
+
+        release = _SimulatedRelease(name=release.name, data=release._make_data())
+
+        context = copy.copy(Context.current())
+        # There is nobody to answer questions.
+        context.assume_yes = True
+
+        with Context.activate(context), self._installed():
+            self._started = time.monotonic()
+
+            while not release.is_done():
+                stages = [p.stage for phase in release.phases for p in phase]
+                proceed(release, pipelined=pipelined)
+
+                # Simulated services never block, but do not loop forever if something does.
+                if stages == [p.stage for phase in release.phases for p in phase]:
+                    break
+
+        return SimulationReport(sorted(self._events, key=lambda e: e.start))
+
+
+@contextmanager
+def _patched(target: Any, name: str, value: Any) -> Iterator[None]:
+    original = getattr(target, name)
+    setattr(target, name, value)
+    try:
+        yield
+    finally:
+        setattr(target, name, original)
+
+
+class _SimulatedRelease(ReleaseState):
+    def save(self) -> None:
+        pass
+
+
+class SimulatedVcs:
+    """In-memory stand-in for `Vcs`, implementing operations used by release tasks."""
+
+    default_remote = 'origin'
+    default_branch = 'master'
+
+    def __init__(self, simulation: Simulation, repo: RepositoryHandle):
+        self.simulation = simulation
+        self.repo = repo
+        self.github = SimulatedGithubRepository(simulation)
+
+    def create_branch(self, branch: str, start: str, delete_existing: bool = False):
+        self.simulation.spend('git')
+
+    def worktree(self, ref: str, *args, **kwargs) -> 'SimulatedVcs':
+        self.simulation.spend('git')
+        return self
+
+    def remove_worktree(self, ref: str):
+        self.simulation.spend('git')
+
+    def delete_local_branch(self, branch: str, force: bool = False):
+        self.simulation.spend('git')
+
+    def fetch(self):
+        self.simulation.spend('fetch')
+
+    def tag(self, tag: str, message=None, ref: str = 'HEAD'):
+        self.simulation.spend('git')
+
+    def push(self, branch: str = None, tag: str = None):
+        self.simulation.spend('push')
+
+    def push_atomic(self, delete_branches: List[str], tags: List[str]):
+        self.simulation.spend('push')
+
+    def create_github_release(self, tag: str, message: str):
+        self.simulation.spend('github')
+
+    def find_pull_request(self, branch: str, **filters) -> Optional['SimulatedPullRequest']:
+        self.simulation.spend('github')
+        return self.github.pulls.get(branch)
+
+    def open_pull_request(self, title: str, body: str, branch: str = None, base: str = None,
+                          push: bool = True) -> bool:
+        if push:
+            self.push(branch=branch)
+
+        if self.find_pull_request(branch) is not None:
+            return False
+
+        self.simulation.spend('github')
+        self.github.open_pull(branch)
+        return True
+
+    def pull_request_status(self, branch: str) -> Optional[PullRequestStatus]:
+        """Status of latest pull request from given branch. Time of the query is not spent here."""
+
+        pr = self.github.pulls.get(branch)
+        if pr is None:
+            return None
+
+        self.github.get_commit(pr.head.sha).wait_for_checks()
+        return PullRequestStatus(number=pr.number, html_url=pr.html_url,
+                                 state='merged' if pr.merged else pr.state,
+                                 mergeable=pr.mergeable)
+
+
+class SimulatedGithubRepository:
+    """In-memory stand-in for GitHub repository, with pull requests passing CI after a while."""
+
+    def __init__(self, simulation: Simulation):
+        self.simulation = simulation
+        self.pulls: Dict[str, SimulatedPullRequest] = {}
+        self._commits: Dict[str, _SimulatedCommit] = {}
+
+    def open_pull(self, branch: str):
+        number = len(self.pulls) + 1
+        sha = f'{number:040x}'
+        self._commits[sha] = _SimulatedCommit(self.simulation,
+                                              self.simulation.now() + self.simulation.sample('ci'))
+        self.pulls[branch] = SimulatedPullRequest(self.simulation, number, sha)
+
+    def get_commit(self, sha: str) -> '_SimulatedCommit':
+        return self._commits[sha]
+
+    def get_pull(self, number: int) -> 'SimulatedPullRequest':
+        return next(pr for pr in self.pulls.values() if pr.number == number)
+
+
+@dataclass
+class _Head:
+    sha: str
+
+
+@dataclass
+class _MergeResult:
+    merged: bool
+    message: str = ''
+
+
+class SimulatedPullRequest:
+    def __init__(self, simulation: Simulation, number: int, sha: str):
+        self.simulation = simulation
+        self.number = number
+        self.head = _Head(sha)
+        self.html_url = f'https://github.com/simulated/pull/{number}'
+        self.state = 'open'
+        self.merged = False
+        self.mergeable = True
+
+    def merge(self) -> _MergeResult:
+        self.simulation.spend('github')
+        self.state = 'closed'
+        self.merged = True
+        return _MergeResult(merged=True)
+
+
+class _SimulatedCommit:
+    def __init__(self, simulation: Simulation, checks_done_at: float):
+        self.simulation = simulation
+        self.checks_done_at = checks_done_at
+
+    def wait_for_checks(self):
+        # Instead of polling, just wait until CI finishes.
+        remaining = self.checks_done_at - self.simulation.now()
+        if remaining > 0:
+            self.simulation.spend('ci', remaining)
+
+
+@dataclass
+class _SimulatedLanguageSupport:
+    """
+    Stands in for a language support class, and for its instances as well, because
+    language support is looked up among classes and then instantiated.
+    """
+
+    simulation: Simulation
+    simulated_language: Language
+
+    def language(self) -> Language:
+        return self.simulated_language
+
+    def __call__(self) -> '_SimulatedLanguageSupport':
+        return self
+
+    def write_release(self, *args, **kwargs):
+        self.simulation.spend('write')
+
+    def dry_run_publish(self, *args, **kwargs):
+        self.simulation.spend('dry-run')
+
+    def publish(self, *args, **kwargs) -> bool:
+        self.simulation.spend('publish')
+        return True
+
+    def is_available(self, *args, **kwargs) -> bool:
+        self.simulation.spend('propagation')
+        return True
+
+
+def parse_latencies(specs: Tuple[str, ...]) -> Dict[str, Latency]:
+    """
+    >>> parse_latencies(('ci=60:10',))['ci']
+    Latency(mean=60.0, spread=10.0)
+    """
+
+    latencies = dict(DEFAULT_LATENCIES)
+    for spec in specs:
+        operation, sep, latency = spec.partition('=')
+        if not sep or operation not in latencies:
+            raise ValueError(f'Invalid latency "{spec}", expected one of '
+                             f'{", ".join(latencies)} followed by =MEAN[:SPREAD]')
+        latencies[operation] = Latency.parse(latency)
+
+    return latencies
@@ -1,9 +1,10 @@
+import threading
 from collections import defaultdict
 from dataclasses import dataclass, field
 from enum import Enum
 from functools import total_ordering
 from textwrap import indent
-from typing import List, Iterator, Collection, Iterable, Dict, Tuple, Set
+from typing import List, Iterator, Collection, Iterable, Dict, Tuple, Set, Optional, Any
 
 import click
 
@@ -15,9 +16,18 @@ from sebex.checksum import Checksum, Checksumable
 from sebex.config.file import ConfigFile
 from sebex.config.format import Format, YamlFormat
 from sebex.config.manifest import Manifest, ProjectHandle
+from sebex.context import Context
 from sebex.edit.span import Span
 from sebex.log import operation, error, warn
 
+RELEASES_PREFIX = 'releases/'
+
+# Older versions supported a single release only, and stored it under this name.
+LEGACY_RELEASE_NAME = 'release'
+
+# Projects are released concurrently, and each of them saves its progress.
+_save_lock = threading.Lock()
+
 
 @total_ordering
 class ReleaseStage(Enum):
@@ -68,14 +78,14 @@ class ReleaseStage(Enum):
 
 @dataclass
 class ReleaseState(ConfigFile, Checksumable):
-    _name = 'release'
-
     sources: Dict[ProjectHandle, Version]
     phases: List['PhaseState']
 
     def __init__(self, name=None, data=None, sources=None, phases=None):
         self.sources = sources
         self.phases = phases
+        # Data prefetched for tasks of the current run, keyed by stage and project. Never saved.
+        self.prefetched: Dict[Tuple['ReleaseStage', ProjectHandle], Any] = {}
 
         super().__init__(name, data)
 
@@ -95,9 +105,70 @@ class ReleaseState(ConfigFile, Checksumable):
     def format(cls) -> Format:
         return YamlFormat(autogenerated=True)
 
+    def save(self) -> None:
+        with _save_lock:
+            super().save()
+
+    @classmethod
+    def _get_name(cls, name):
+        # Releases are addressed by their names, each one is stored in a separate file.
+        if name is None:
+            raise ValueError('Release name must be provided')
+
+        if not name.startswith(RELEASES_PREFIX):
+            name = f'{RELEASES_PREFIX}{name}'
+
+        return name
+
+    @classmethod
+    def pending(cls) -> List[str]:
+        """List names of all releases which have been saved and not finished yet."""
+        directory = Context.current().meta_path / RELEASES_PREFIX
+        return sorted(p.stem for p in directory.glob(f'*{cls.format().ext()}'))
+
+    @classmethod
+    def open_legacy(cls) -> Optional['ReleaseState']:
+        """
+        Open release saved by older versions of Sebex, if there is one. It is given its default
+        name, so saving it stores it among other releases.
+        """
+
+        full_path = cls.format().full_path(LEGACY_RELEASE_NAME)
+        if not full_path.exists():
+            return None
+
+        with open(full_path, 'r') as f:
+            rel = cls(data=cls.format().load(f))
+
+        rel.name = rel.default_name()
+        return rel
+
+    @classmethod
+    def delete_legacy(cls):
+        cls.format().full_path(LEGACY_RELEASE_NAME).unlink()
+
+    @property
+    def name(self) -> Optional[str]:
+        if self._name is None:
+            return None
+
+        return self._name[len(RELEASES_PREFIX):]
+
+    @name.setter
+    def name(self, name: str):
+        self._name = self._get_name(name)
+
     def codename(self) -> str:
         return Checksum.of(self).petname
 
+    def default_name(self) -> str:
+        return self.codename().lower().replace(' ', '-')
+
+    def projects(self) -> Iterator[ProjectHandle]:
+        for phase in self.phases:
+            for project in phase:
+                yield project.project
+
     def has_project(self, project: ProjectHandle) -> bool:
         for phase in self.phases:
             if phase.has_project(project):
@@ -112,6 +183,21 @@ class ReleaseState(ConfigFile, Checksumable):
 
         raise KeyError(f'Project {project} is not part of this release.')
 
+    def dependencies_of(self, project: 'ProjectState') -> List['ProjectState']:
+        """Get states of released projects, which given project directly depends on."""
+        if project.depends_on is not None:
+            return [self.get_project(d) for d in project.depends_on]
+
+        # Releases planned before dependencies were tracked only know about phase order,
+        # so each project has to wait for all projects from preceding phases.
+        result = []
+        for phase in self.phases:
+            if project in phase:
+                return result
+            result.extend(phase)
+
+        raise KeyError(f'Project {project.project} is not part of this release.')
+
     def current_phase(self) -> 'PhaseState':
         for phase in self.phases:
             if not phase.is_done():
@@ -186,12 +272,14 @@ class ReleaseState(ConfigFile, Checksumable):
     def _build_plan(self, db: AnalysisDatabase, graph: DependentsGraph):
         """
         Propagates version bumps down the phases, we are searching for
-        maximum needed bump for each project. Fills `dependency_updates` fields in project states.
+        maximum needed bump for each project. Fills `dependency_updates` and `depends_on` fields
+        in project states.
         """
 
         # We will track the minimal version bump needed for each project
         bumps = defaultdict(lambda: Bump.STAY_AS_IS)
         dependency_updates = defaultdict(lambda: [])
+        depends_on = defaultdict(lambda: [])
 
         # Seed bumps with source projects
         for handle in self.sources.keys():
@@ -202,6 +290,8 @@ class ReleaseState(ConfigFile, Checksumable):
 
         # Here we go
         for project, dependency, relation in self._dependency_relations(db, graph):
+            depends_on[dependency].append(project.project)
+
             # We need to handle each dependency kind (version req, git, path) separately
             if relation.version_spec.is_version:
                 req: VersionRequirement = relation.version_spec.value
@@ -247,6 +337,7 @@ class ReleaseState(ConfigFile, Checksumable):
         # Apply dependency updates
         for project in projects.values():
             project.dependency_updates = dependency_updates[project.project]
+            project.depends_on = sorted(set(depends_on[project.project]))
 
     def _dependency_relations(
         self,
@@ -288,6 +379,12 @@ class ReleaseState(ConfigFile, Checksumable):
         )
         self.phases = [phase for phase in pruned_phases if phase]
 
+        # Dependencies which are not released do not constrain execution order.
+        released = set(self.projects())
+        for phase in self.phases:
+            for project in phase:
+                project.depends_on = [d for d in project.depends_on if d in released]
+
     @classmethod
     def _is_project_noop(cls, project: 'ProjectState') -> bool:
         if project.from_version == project.to_version:
@@ -381,8 +478,14 @@ class ProjectState(Checksumable):
     version_span: Span
     language: Language
     publish: bool = False
+    # Name of the package in its registry, `None` if unknown.
+    package: Optional[str] = None
     dependency_updates: List[DependencyUpdate] = field(default_factory=list)
     stage: ReleaseStage = ReleaseStage.CLEAN
+    # Released projects this project depends on, `None` if unknown.
+    depends_on: Optional[List[ProjectHandle]] = field(default_factory=list)
+    # Sub-steps completed by the task leading to next stage, cleared when stage is reached.
+    checkpoints: List[str] = field(default_factory=list)
 
     @property
     def bump(self) -> Bump:
@@ -438,6 +541,7 @@ class ProjectState(Checksumable):
             version_span=about.version_span,
             language=db.language(project),
             publish=publish,
+            package=about.package,
         )
 
     def checksum(self, hasher):
@@ -457,9 +561,18 @@ class ProjectState(Checksumable):
             'publish': self.publish,
         }
 
+        if self.package is not None:
+            d['package'] = self.package
+
         if self.dependency_updates:
             d['dependency_updates'] = [d.to_raw() for d in self.dependency_updates]
 
+        if self.depends_on is not None:
+            d['depends_on'] = [str(p) for p in self.depends_on]
+
+        if self.checkpoints:
+            d['checkpoints'] = list(self.checkpoints)
+
         return d
 
     @classmethod
@@ -471,9 +584,13 @@ class ProjectState(Checksumable):
             version_span=Span.from_raw(o['version_span']),
             language=Language(o['language']),
             publish=o['publish'],
+            package=o.get('package'),
             dependency_updates=[DependencyUpdate.from_raw(d)
                                 for d in o.get('dependency_updates', [])],
             stage=ReleaseStage(o['stage']),
+            depends_on=([ProjectHandle.parse(p) for p in o['depends_on']]
+                        if 'depends_on' in o else None),
+            checkpoints=list(o.get('checkpoints', [])),
         )
 
 
@@ -0,0 +1,126 @@
+"""
+Pool of GitPython repository objects shared by all jobs.
+
+GitPython `Repo` objects may keep persistent `git cat-file` processes alive, so they should
+neither be created on every access, nor kept for all repositories of a large workspace forever.
+The pool keeps a bounded number of them and closes the least recently used ones.
+
+Each repository gets two objects. The one returned by `get` only runs Git commands, its object
+database never spawns persistent processes, so it can be used by many threads at once and is
+simply forgotten on eviction. The one claimed by `open` reads objects through persistent processes,
+it is used by a single thread at a time and is only closed when nobody claims it.
+"""
+
+import threading
+from collections import OrderedDict, defaultdict, Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Dict, Callable, Optional
+
+from git import Repo as GitRepo
+from git.db import GitDB
+
+from sebex.ssh import git_environment
+
+DEFAULT_CAPACITY = 64
+
+
+@dataclass
+class _Entry:
+    commands: GitRepo
+    objects: Optional[GitRepo] = None
+
+
+class RepoPool:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY,
+                 environment: Callable[[], Dict[str, str]] = dict):
+        self.capacity = capacity
+        # Environment of all Git commands run through pooled objects. It is set once, as changing
+        # environment of objects shared by threads would leak it into commands of others.
+        self.environment = environment
+        self._entries: 'OrderedDict[Path, _Entry]' = OrderedDict()
+        self._in_use: Counter = Counter()
+        self._locks: Dict[Path, threading.RLock] = defaultdict(threading.RLock)
+        self._lock = threading.Lock()
+
+    def get(self, location: Path) -> GitRepo:
+        """
+        Get repository object for running Git commands, safe to use from any thread.
+        Objects are read directly from the object database, use `open` to read them through
+        persistent processes instead.
+        """
+
+        with self._lock:
+            return self._checkout(location.resolve()).commands
+
+    @contextmanager
+    def open(self, location: Path) -> Iterator[GitRepo]:
+        """
+        Claim repository object reading objects through persistent processes exclusively.
+        Claimed objects are never closed by eviction, and other threads opening the same
+        repository wait until they are released.
+        """
+
+        location = location.resolve()
+        with self._lock:
+            lock = self._locks[location]
+
+        with lock:
+            with self._lock:
+                entry = self._checkout(location)
+                if entry.objects is None:
+                    entry.objects = self._create(location)
+                self._in_use[location] += 1
+
+            try:
+                yield entry.objects
+            finally:
+                with self._lock:
+                    self._in_use[location] -= 1
+                    self._evict()
+
+    def close(self):
+        with self._lock:
+            for location in list(self._entries.keys()):
+                if not self._in_use[location]:
+                    self._close(location)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _create(self, location: Path, **kwargs) -> GitRepo:
+        repo = GitRepo(location, **kwargs)
+        repo.git.update_environment(**self.environment())
+        return repo
+
+    def _checkout(self, location: Path) -> _Entry:
+        entry = self._entries.pop(location, None)
+        if entry is None:
+            # Pure Python object database does not spawn any processes.
+            entry = _Entry(commands=self._create(location, odbt=GitDB))
+
+        # Most recently used repositories are kept at the end.
+        self._entries[location] = entry
+        self._evict()
+        return entry
+
+    def _evict(self):
+        # The most recently used repository is about to be used, so it is never evicted.
+        for location in list(self._entries.keys())[:-1]:
+            if len(self._entries) <= self.capacity:
+                break
+
+            if not self._in_use[location]:
+                self._close(location)
+
+    def _close(self, location: Path):
+        entry = self._entries.pop(location)
+        del self._in_use[location]
+        # Objects for running commands may still be used by other threads, but hold no
+        # processes, so they are just forgotten.
+        if entry.objects is not None:
+            entry.objects.close()
+
+
+pool = RepoPool(environment=git_environment)
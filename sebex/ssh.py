@@ -0,0 +1,125 @@
+"""
+Sharing SSH connections among concurrently running Git commands.
+
+Each Git command talking to a remote over SSH would normally establish its own connection,
+and with many repositories the handshakes (and throttling of new connections by the server)
+dominate the run time. Instead, all commands are made to multiplex their sessions over a single
+master connection per host, and the number of concurrent sessions per host is limited.
+"""
+
+import os
+import re
+import shlex
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from sebex.context import Context
+
+SSH_DIRECTORY = 'ssh'
+
+# How long (in seconds) an idle master connection is kept open.
+_CONTROL_PERSIST = 60
+
+# Unix socket paths are limited to about 100 bytes, `%C` expands to 40 characters.
+_MAX_CONTROL_DIRECTORY_LENGTH = 50
+
+_SCP_LIKE_URL = re.compile(r'^(?:[^@/]+@)?(?P<host>[^:/]+):')
+
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_host_semaphores_lock = threading.Lock()
+
+
+def remote_host(url: str) -> Optional[str]:
+    """
+    Get host of remote repository, or `None` for local ones.
+
+    >>> remote_host('git@github.com:membraneframework/sebex.git')
+    'github.com'
+    >>> remote_host('ssh://git@github.com/membraneframework/sebex.git')
+    'github.com'
+    >>> remote_host('/tmp/remote.git') is None
+    True
+    """
+
+    parsed = urlsplit(url)
+    if parsed.scheme:
+        return parsed.hostname if parsed.scheme != 'file' else None
+
+    m = _SCP_LIKE_URL.match(url)
+    return m['host'] if m else None
+
+
+def remote_path(url: str) -> str:
+    """
+    Get path of remote repository on its host.
+
+    >>> remote_path('git@github.com:membraneframework/sebex.git')
+    'membraneframework/sebex.git'
+    >>> remote_path('https://github.com/membraneframework/sebex')
+    '/membraneframework/sebex'
+    >>> remote_path('/tmp/remote.git')
+    '/tmp/remote.git'
+    """
+
+    parsed = urlsplit(url)
+    if parsed.scheme:
+        return parsed.path
+
+    m = _SCP_LIKE_URL.match(url)
+    return url[m.end():] if m else url
+
+
+def git_environment() -> Dict[str, str]:
+    """Environment variables making Git share SSH master connections."""
+
+    if os.name != 'posix':
+        # Connection multiplexing is not supported by OpenSSH on Windows.
+        return {}
+
+    command = os.environ.get('GIT_SSH_COMMAND', 'ssh')
+    return {
+        'GIT_SSH_COMMAND': ' '.join([
+            command,
+            '-o', 'ControlMaster=auto',
+            '-o', shlex.quote(f'ControlPath={_control_directory() / "%C"}'),
+            '-o', f'ControlPersist={_CONTROL_PERSIST}',
+        ]),
+    }
+
+
+@contextmanager
+def connection(url: str):
+    """
+    Wait for a free connection slot to host of given remote, and yield environment variables
+    for Git commands talking to it.
+    """
+
+    host = remote_host(url)
+    if host is None:
+        yield {}
+        return
+
+    with _host_semaphore(host):
+        yield git_environment()
+
+
+def _host_semaphore(host: str) -> threading.BoundedSemaphore:
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            limit = Context.current().connections_per_host
+            _host_semaphores[host] = threading.BoundedSemaphore(limit)
+
+        return _host_semaphores[host]
+
+
+def _control_directory() -> Path:
+    directory = Context.current().meta_path / SSH_DIRECTORY
+    if len(str(directory)) > _MAX_CONTROL_DIRECTORY_LENGTH:
+        directory = Path(tempfile.gettempdir()) / f'sebex-ssh-{os.getuid()}'
+
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return directory
@@ -1,8 +1,14 @@
+import os
 import re
+import tempfile
+import threading
+from collections import defaultdict
 from dataclasses import dataclass
-from functools import cached_property
+from functools import cached_property, wraps
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Dict, Tuple, Set, Iterable
+
+from contextlib import contextmanager
 
 import click
 from git import Head, Repo as GitRepo, GitCommandError
@@ -10,9 +16,14 @@ from github import Repository as GithubRepository
 from github.PullRequest import PullRequest
 
 from sebex.cli import confirm
-from sebex.config.manifest import RepositoryHandle, Manifest
+from sebex.config.manifest import RepositoryHandle, Manifest, ProjectHandle
+from sebex.config.workspace import WorkspaceConfig
 from sebex.context import Context
 from sebex.log import log, operation, fatal, warn
+from sebex import mirror, popen
+from sebex.ssh import connection
+from sebex.repo_pool import pool
+from sebex.vcs_backend import Status, Refs, backend_for
 
 _GITHUB_SSH_URL = re.compile(
     r'git@github\.com:(?P<full>(?P<org>[^/]+)/(?P<repo>.+))\.git/?')
@@ -23,32 +34,193 @@ _PR_MARKETING = r'''
 
 _SKIP = click.style('SKIPPED', fg='yellow')
 
+WORKTREES_DIRECTORY = 'worktrees'
+
+# Worktrees of one repository share refs and objects, so operations touching these,
+# like fetching, pushing, tagging or managing worktrees themselves, must not run concurrently.
+_repository_locks = defaultdict(threading.RLock)
+_repository_locks_lock = threading.Lock()
+
+
+def _repository_lock(repo: RepositoryHandle) -> threading.RLock:
+    with _repository_locks_lock:
+        return _repository_locks[repo.name]
+
+
+def _read_blob(location: Path, ref: str, path: Path) -> Optional[bytes]:
+    """
+    Read contents of file at given revision through long-lived `git cat-file --batch` process
+    of pooled repository object, without spawning a process per file.
+    """
+
+    with pool.open(location) as repo:
+        # Partial clones fetch missing blobs on demand.
+        try:
+            _, kind, _, data = repo.git.get_object_data(f'{ref}:{path.as_posix()}')
+        except ValueError:
+            return None
+
+    return data if kind == b'blob' else None
+
+
+def _blob_exists(location: Path, ref: str, path: Path) -> bool:
+    with pool.open(location) as repo:
+        try:
+            _, kind, _ = repo.git.get_object_header(f'{ref}:{path.as_posix()}')
+        except ValueError:
+            return False
+
+    return kind == b'blob'
+
+
+# Bumped by every operation changing any repository, worktrees share refs after all.
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def _invalidate_snapshots():
+    global _generation
+    with _generation_lock:
+        _generation += 1
+
+
+def _mutating(method):
+    """Mark `Vcs` method as changing repository state, invalidating all snapshots."""
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _invalidate_snapshots()
+
+    return wrapper
+
+
+def _current_generation() -> Tuple[int, int]:
+    return _generation, popen.generation()
+
+
+def _parse_disk_usage(output: str) -> int:
+    """
+    Get size of object store in bytes, from output of `git count-objects -v`.
+
+    >>> _parse_disk_usage('count: 2\\nsize: 8\\nin-pack: 3\\npacks: 1\\nsize-pack: 1\\n'
+    ...                   'prune-packable: 0\\ngarbage: 0\\nsize-garbage: 1')
+    10240
+    """
+
+    values = dict(line.split(': ', 1) for line in output.splitlines())
+    return sum(int(values.get(key, 0)) for key in ('size', 'size-pack', 'size-garbage')) * 1024
+
+
+def _parse_ref_tips(output: str) -> Dict[str, str]:
+    """
+    Parse `<sha> TAB <ref>` lines, as printed by `git ls-remote`, skipping peeled tags.
+
+    >>> _parse_ref_tips('abc\\trefs/heads/master\\ndef\\trefs/tags/v1.0.0\\n'
+    ...                 'abc\\trefs/tags/v1.0.0^{}')
+    {'refs/heads/master': 'abc', 'refs/tags/v1.0.0': 'def'}
+    """
+
+    tips = {}
+    for line in output.splitlines():
+        sha, _, ref = line.partition('\t')
+        if not ref.endswith('^{}'):
+            tips[ref] = sha
+
+    return tips
+
+
+class _Snapshot:
+    """
+    State of repository, queried lazily and at most once.
+    Must be dropped when the repository changes.
+    """
+
+    def __init__(self, location: Path):
+        self.backend = backend_for(location)
+        self.generation = _current_generation()
+
+    @property
+    def is_current(self) -> bool:
+        return self.generation == _current_generation()
+
+    @cached_property
+    def status(self) -> Status:
+        return self.backend.status()
+
+    @cached_property
+    def tracked(self) -> Set[str]:
+        return self.backend.tracked()
+
+    @cached_property
+    def refs(self) -> Refs:
+        return self.backend.refs()
+
 
 @dataclass
 class Vcs:
     """
     A central facade over Git & GitHub operations on repository.
+
+    By default, operations are performed in the main clone of the repository in the workspace.
+    Instances returned by `worktree` operate on dedicated worktrees instead, leaving the main
+    clone intact.
     """
 
     repo: RepositoryHandle
+    root: Optional[Path] = None
 
     @property
     def location(self) -> Path:
+        if self.root is not None:
+            return self.root
+
         return self.repo.location
 
-    @cached_property
+    def project_location(self, project: ProjectHandle) -> Path:
+        return self.location / project.path
+
+    @contextmanager
+    def _remote_connection(self):
+        """
+        Run Git commands talking to the remote over shared SSH connection. Pooled repository
+        objects already have the environment for sharing it, this waits for a free slot only.
+        """
+        with connection(self.git.remote().url):
+            yield
+
+    @property
+    def _snapshot(self) -> _Snapshot:
+        snapshot = self.__dict__.get('_snapshot_cache')
+        if snapshot is None or not snapshot.is_current:
+            snapshot = self.__dict__['_snapshot_cache'] = _Snapshot(self.location)
+        return snapshot
+
+    def _relative(self, file: Path) -> Optional[str]:
+        try:
+            return file.resolve().relative_to(self.location.resolve()).as_posix()
+        except ValueError:
+            return None
+
+    @property
     def git(self) -> GitRepo:
-        return GitRepo(self.location)
+        return pool.get(self.location)
 
     @cached_property
-    def github(self) -> GithubRepository:
+    def github_full_name(self) -> str:
         manifest = Manifest.open().get_repository_by_name(self.repo)
         m = _GITHUB_SSH_URL.match(manifest.remote_url)
         if m:
-            return Context.current().github.get_repo(m['full'], lazy=True)
+            return m['full']
         else:
             raise ValueError('Repository is not hosted on GitHub')
 
+    @cached_property
+    def github(self) -> GithubRepository:
+        return Context.current().github.get_repo(self.github_full_name, lazy=True)
+
     @cached_property
     def default_branch(self) -> str:
         manifest = Manifest.open().get_repository_by_name(self.repo)
@@ -56,35 +228,177 @@ class Vcs:
 
     @property
     def active_branch(self) -> str:
-        return self.git.active_branch.name
+        head = self._snapshot.status.head
+        if head is None:
+            raise TypeError(f'HEAD of {self.location} is detached')
+        return head
 
     @property
     def default_remote(self) -> str:
         return self.git.remote().name
 
-    def is_dirty(self) -> bool:
-        return self.git.is_dirty()
+    # Queries below are answered from a snapshot of repository state, which is refreshed after
+    # any change made through `Vcs` or any external command run by Sebex.
+
+    def is_dirty(self, ignore: Iterable[Path] = ()) -> bool:
+        status = self._snapshot.status
+        ignored = {self._relative(file) for file in ignore}
+        return bool(status.staged - ignored or status.unstaged - ignored)
 
     def is_tracked(self, file: Path) -> bool:
-        return file.resolve() in ((self.location / line).resolve()
-                                  for line in self.git.git.ls_files().split('\n'))
+        return self._relative(file) in self._snapshot.tracked
 
     def is_changed(self, file: Path) -> bool:
-        return file.resolve() in ((self.location / item.a_path).resolve()
-                                  for item in self.git.index.diff(None))
+        return self._relative(file) in self._snapshot.status.unstaged
 
     def branch_exists(self, branch: str) -> bool:
-        return branch in (h.name for h in self.git.heads)
-
+        return branch in self._snapshot.refs.heads
+
+    def tracking_branch(self, branch: str) -> Optional[str]:
+        return self._snapshot.refs.heads.get(branch)
+
+    def tag_exists(self, tag: str) -> bool:
+        return tag in self._snapshot.refs.tags
+
+    def disk_usage(self) -> int:
+        """Size of the object store in bytes, including loose objects and garbage."""
+        return _parse_disk_usage(self.git.git.count_objects('-v'))
+
+    @_mutating
+    def maintain(self, fsmonitor: bool = False):
+        """
+        Optimize the repository for faster queries and fetches: pack loose objects and refs,
+        repack packs incrementally into a multi-pack index, write commit graph, and cache
+        untracked files (and, if `fsmonitor` is set, watch the file system) for `git status`.
+        """
+
+        with operation('Maintaining', self.repo), _repository_lock(self.repo):
+            self.git.git.config('core.untrackedCache', 'true')
+            if fsmonitor:
+                self.git.git.config('core.fsmonitor', 'true')
+
+            # Packs written by the first run are not noticed by the second one within single
+            # Git process, and multi-pack index cannot be written without any packs.
+            self.git.git.maintenance('run', '--task=loose-objects', '--task=pack-refs')
+            # Loose objects are packed, but removed only by next run of the task.
+            self.git.git.prune_packed()
+            if any(Path(self.git.common_dir, 'objects', 'pack').glob('*.pack')):
+                self.git.git.maintenance('run', '--task=incremental-repack')
+            self.git.git.maintenance('run', '--task=commit-graph')
+
+    def is_sparse(self) -> bool:
+        # Sparse checkout settings may live in per-worktree config, which GitPython does not read.
+        return self.git.git.config('--type=bool', '--default=false',
+                                   '--get', 'core.sparseCheckout') == 'true'
+
+    def sparse_directories(self) -> Optional[Set[str]]:
+        """Directories checked out by sparse checkout in cone mode, or `None` if not in use."""
+        cone = self.git.git.config('--type=bool', '--default=false',
+                                   '--get', 'core.sparseCheckoutCone') == 'true'
+        if not self.is_sparse() or not cone:
+            return None
+
+        return set(self.git.git.sparse_checkout('list').splitlines())
+
+    @_mutating
+    def set_sparse_checkout(self, directories: List[str]):
+        """
+        Check out only given directories (recursively) and files in the root directory.
+        Uses cone mode, which is much faster than arbitrary patterns.
+        """
+        with operation('Updating sparse checkout', self.repo):
+            self.git.git.sparse_checkout('set', '--cone', '--', *directories)
+
+    @_mutating
+    def disable_sparse_checkout(self):
+        with operation('Checking out all files', self.repo):
+            self.git.git.sparse_checkout('disable')
+
+    def is_synced(self, pull: bool = True) -> bool:
+        """
+        Check whether fetching (or pulling, if `pull` is set) would not change anything.
+
+        Only tips of remote branches and tags are listed and compared with local refs,
+        which is much cheaper than negotiating a fetch. Fetches do not prune, so local-only tags
+        and refs of branches deleted on the remote do not count as changes.
+        """
+
+        self._update_mirror()
+        with operation('Checking for changes', self.repo) as reporter:
+            with self._remote_connection():
+                remote = _parse_ref_tips(
+                    self.git.git.ls_remote('--heads', '--tags', self.default_remote))
+
+            prefix = f'refs/remotes/{self.default_remote}/'
+            local = {}
+            for ref, sha in _parse_ref_tips(self.git.git.for_each_ref(
+                    '--format=%(objectname)%09%(refname)', prefix, 'refs/tags/')).items():
+                if ref.startswith(prefix):
+                    if ref != f'{prefix}HEAD':
+                        local['refs/heads/' + ref[len(prefix):]] = sha
+                else:
+                    local[ref] = sha
+
+            synced = all(local.get(ref) == sha for ref, sha in remote.items())
+            if synced and pull:
+                # The current branch may still lag behind its already fetched upstream.
+                tips = self.git.git.rev_parse('HEAD', '@{upstream}', with_exceptions=False)
+                lines = tips.splitlines()
+                synced = len(lines) == 2 and lines[0] == lines[1]
+
+            if synced:
+                reporter(click.style('UNCHANGED', fg='green'))
+
+            return synced
+
+    def use_mirror(self, location: Optional[Path]):
+        """
+        Redirect fetches to the mirror at given location, or stop redirecting them if `None`.
+        Objects already borrowed from the mirror keep being borrowed.
+        """
+
+        url = self.git.remote().url
+        current = self._mirror()
+        if current is not None:
+            self.git.git.config('--local', '--unset-all', f'url.{current}.insteadOf')
+            self.git.git.config('--local', '--unset-all', f'url.{url}.pushInsteadOf')
+
+        if location is not None:
+            for entry in mirror.redirect_config(location, url):
+                key, _, value = entry.partition('=')
+                self.git.git.config('--add', key, value)
+
+    def _mirror(self) -> Optional[Path]:
+        """Mirror fetches are redirected to by `use_mirror`, if any."""
+        config = self.git.git.config('--local', '--get-regexp', r'^url\.',
+                                     with_exceptions=False)
+        return mirror.redirected_mirror(config, self.git.remote().url)
+
+    def _update_mirror(self):
+        """Update the mirror fetches are redirected to, if any."""
+
+        location = self._mirror()
+        if location is not None:
+            mirror.update(location, self.git.remote().url, self.repo)
+
+    @_mutating
     def fetch(self):
-        with operation('Fetching', self.repo):
-            self.git.remote().fetch(refspec='refs/heads/*:refs/remotes/origin/*')
-            self.git.remote().fetch(refspec='refs/tags/*:refs/tags/*')
-
+        self._update_mirror()
+        with operation('Fetching', self.repo), _repository_lock(self.repo), \
+                self._remote_connection():
+            # Fetch both branches and tags within single connection.
+            self.git.remote().fetch(refspec=['+refs/heads/*:refs/remotes/origin/*',
+                                             'refs/tags/*:refs/tags/*'],
+                                    **WorkspaceConfig.open().fetch_options())
+
+    @_mutating
     def pull(self):
-        with operation('Pulling', self.repo):
-            self.git.remote().pull()
+        self._update_mirror()
+        with operation('Pulling', self.repo), _repository_lock(self.repo), \
+                self._remote_connection():
+            self.git.remote().pull(**WorkspaceConfig.open().fetch_options())
 
+    @_mutating
     def commit(self, base_message: str, files: List[Path] = None):
         log('Commit:', click.style(base_message, fg='magenta'))
 
@@ -96,22 +410,151 @@ class Vcs:
 
         self.git.git.commit('-m', base_message)
 
-    def tag(self, tag: str, message=None):
-        self.git.create_tag(tag, message=message)
+    def read_file(self, ref: str, path: Path) -> Optional[bytes]:
+        """
+        Read contents of file at given revision, without checking it out.
+        Path is relative to repository root. Returns `None` if the file does not exist.
+
+        Files are read through a single `git cat-file` process per repository, which is kept
+        running, so reading many files is cheap.
+        """
+
+        return _read_blob(self.location, ref, path)
+
+    def file_exists(self, ref: str, path: Path) -> bool:
+        return _blob_exists(self.location, ref, path)
+
+    @_mutating
+    def commit_files(self, branch: str, message: str, edits: Dict[Path, bytes],
+                     parent: Optional[str] = None) -> str:
+        """
+        Commit given file contents on top of `branch` (or `parent`, if given) as a single commit,
+        and point `branch` at it. Paths are relative to repository root.
+
+        This neither needs nor touches any working tree, so the branch must not be checked out.
+        Returns the hash of created commit.
+        """
+
+        log('Commit:', click.style(message, fg='magenta'))
+
+        ref = f'refs/heads/{branch}'
+        old = self.git.git.rev_parse('--verify', '-q', ref, with_exceptions=False)
+
+        if parent is None:
+            if not old:
+                raise ValueError(f'Branch {branch} does not exist.')
+            parent = old
+
+        checked_out = self._checked_out_branch_location(branch)
+        if checked_out is not None:
+            fatal(f'Branch {branch} is checked out in {checked_out}',
+                  'and cannot be committed to directly.')
+
+        modes = self._ls_tree(parent, list(edits.keys()))
+
+        fd, index = tempfile.mkstemp(prefix='sebex-index-')
+        os.close(fd)
+        env = {'GIT_INDEX_FILE': index}
+
+        try:
+            self.git.git.read_tree(parent, env=env)
+
+            index_info = []
+            for path, content in edits.items():
+                with tempfile.TemporaryFile() as f:
+                    f.write(content)
+                    f.seek(0)
+                    sha = self.git.git.hash_object('-w', '--stdin', f'--path={path.as_posix()}',
+                                                   istream=f)
+
+                mode, _ = modes.get(path, ('100644', None))
+                index_info.append(f'{mode} {sha}\t{path.as_posix()}\n')
+
+            with tempfile.TemporaryFile() as f:
+                f.write(''.join(index_info).encode())
+                f.seek(0)
+                self.git.git.update_index('--index-info', istream=f, env=env)
+
+            tree = self.git.git.write_tree(env=env)
+        finally:
+            os.unlink(index)
+
+        commit = self.git.git.commit_tree(tree, '-p', parent, '-m', message)
+
+        with _repository_lock(self.repo):
+            # Compare-and-swap, so that concurrent updates of the branch are not lost.
+            self.git.git.update_ref('-m', f'sebex: {message}', ref, commit, old)
+
+        return commit
+
+    def _ls_tree(self, ref: str, paths: List[Path]) -> Dict[Path, Tuple[str, str]]:
+        """Get `(mode, sha)` of blobs at given paths in given revision."""
+
+        if not paths:
+            return {}
+
+        result = {}
+        for line in self.git.git.ls_tree(ref, '--', *(p.as_posix() for p in paths)).splitlines():
+            info, path = line.split('\t', 1)
+            mode, kind, sha = info.split(' ')
+            if kind == 'blob':
+                result[Path(path)] = (mode, sha)
+
+        return result
+
+    def _checked_out_branch_location(self, branch: str) -> Optional[Path]:
+        location = None
+        for line in self.git.git.worktree('list', '--porcelain').splitlines():
+            if line.startswith('worktree '):
+                location = Path(line[len('worktree '):])
+            elif line == f'branch refs/heads/{branch}':
+                return location
+
+        return None
+
+    @_mutating
+    def create_branch(self, branch: str, start: str, delete_existing: bool = False):
+        """Create branch pointing at `start`, without checking it out anywhere."""
+
+        with operation(f'Creating branch {branch}'), _repository_lock(self.repo):
+            if self.branch_exists(branch):
+                if not delete_existing:
+                    fatal(f'Branch {branch} already exists.')
+
+                self._delete_stale_branch(branch)
+
+            self.git.git.branch(branch, start)
+
+    @_mutating
+    def _delete_stale_branch(self, branch: str):
+        tracking = self.tracking_branch(branch)
+        if tracking is not None:
+            fatal(f'Branch {branch} is already created and',
+                  f'it tracks a remote branch {tracking}.',
+                  'Remove both branches before making changes.')
+
+        self.remove_worktree(branch)
+        warn('Deleting existing branch', branch)
+        Head.delete(self.git, branch, force=True)
+
+    @_mutating
+    def tag(self, tag: str, message=None, ref: str = 'HEAD'):
+        with _repository_lock(self.repo):
+            self.git.create_tag(tag, ref=ref, message=message)
 
     def create_github_release(self, tag: str, message: str):
         self.github.create_git_release(
             tag=tag, name=tag, message=message, generate_release_notes=True)
 
+    @_mutating
     def checkout(self, branch: str, ensure_clean: bool = True, delete_existing: bool = False):
         with operation(f'Checking out branch {branch}'):
             # Clean existing (remote) branch if it exists
             if delete_existing and self.branch_exists(branch):
-                head: Head = next(
-                    h for h in self.git.heads if h.name == branch)
-                if head.tracking_branch() is not None:
+                tracking = self.tracking_branch(branch)
+                if tracking is not None:
                     fatal(f'Branch {branch} is already created and',
-                          f'it tracks a remote branch {head.tracking_branch()}.',
+                          f'it tracks a remote branch {tracking}.',
                           'Remove both branches before making changes.')
                 else:
                     if self.active_branch == branch:
@@ -132,15 +575,18 @@ class Vcs:
             else:
                 self.git.git.checkout('-b', branch)
 
+    @_mutating
     def push(self, branch: str = None, tag: str = None):
         def do_push(*args):
-            try:
-                self.git.git.push(*args)
-            except GitCommandError as e:
-                if '[rejected]' in e.stderr and confirm('Push was rejected, try to force push?'):
-                    self.git.git.push('-f', *args)
-                else:
-                    raise
+            with _repository_lock(self.repo), self._remote_connection():
+                try:
+                    self.git.git.push(*args)
+                except GitCommandError as e:
+                    if '[rejected]' in e.stderr and \
+                            confirm('Push was rejected, try to force push?'):
+                        self.git.git.push('-f', *args)
+                    else:
+                        raise
 
         if branch:
             with operation(f'Pushing branch {branch} to remote repository'):
@@ -150,15 +596,45 @@ class Vcs:
             with operation(f'Pushing tag {tag} to remote repository'):
                 do_push('origin', tag)
 
-    def delete_local_branch(self, branch: str):
-        with operation(f'Deleting local branch {branch}') as reporter:
+    @_mutating
+    def push_atomic(self, delete_branches: List[str] = (), tags: List[str] = ()):
+        """
+        Delete remote branches and push tags within single atomic push.
+
+        Branches which no longer exist on remote (e.g. removed by GitHub after merging pull
+        request) are skipped, at the cost of another round-trip.
+        """
+
+        refspecs = [*(f':refs/heads/{b}' for b in delete_branches),
+                    *(f'refs/tags/{t}' for t in tags)]
+
+        with operation(f'Pushing {", ".join(refspecs)} to remote repository') as reporter, \
+                _repository_lock(self.repo), self._remote_connection():
+            try:
+                self.git.git.push('--atomic', self.default_remote, *refspecs)
+            except GitCommandError as e:
+                if not delete_branches or 'remote ref does not exist' not in e.stderr:
+                    raise
+
+                if tags:
+                    self.git.git.push('--atomic', self.default_remote,
+                                      *(f'refs/tags/{t}' for t in tags))
+
+                reporter(click.style('BRANCHES ALREADY DELETED', fg='yellow'))
+
+    @_mutating
+    def delete_local_branch(self, branch: str, force: bool = False):
+        with operation(f'Deleting local branch {branch}') as reporter, \
+                _repository_lock(self.repo):
             if self.branch_exists(branch):
-                Head.delete(self.git, branch)
+                Head.delete(self.git, branch, force=force)
             else:
                 reporter(_SKIP)
 
+    @_mutating
     def delete_remote_branch(self, branch: str):
-        with operation(f'Deleting remote branch {self.default_remote}/{branch}') as reporter:
+        with operation(f'Deleting remote branch {self.default_remote}/{branch}') as reporter, \
+                _repository_lock(self.repo), self._remote_connection():
             try:
                 self.git.git.push(self.default_remote, '--delete', branch)
             except GitCommandError as e:
@@ -167,6 +643,59 @@ class Vcs:
                 else:
                     raise
 
+    def worktree_location(self, ref: str) -> Path:
+        return Context.current().meta_path / WORKTREES_DIRECTORY / self.repo.name / \
+               ref.replace('/', '-')
+
+    def worktree(self, ref: str, new_branch_from: Optional[str] = None,
+                 ensure_clean: bool = True, delete_existing: bool = False) -> 'Vcs':
+        """
+        Get facade operating on a dedicated worktree with given branch or tag checked out,
+        creating the worktree if needed. Worktrees share objects and refs with the main clone.
+
+        If `new_branch_from` is given and `ref` branch does not exist, it is created from it.
+        """
+
+        location = self.worktree_location(ref)
+
+        with _repository_lock(self.repo):
+            # Clean existing (remote) branch if it exists
+            if delete_existing and self.branch_exists(ref):
+                self._delete_stale_branch(ref)
+
+            if not location.exists():
+                with operation(f'Creating worktree for {ref}'):
+                    # Forget worktrees which have been removed manually.
+                    self.git.git.worktree('prune')
+
+                    if self.branch_exists(ref):
+                        self.git.git.worktree('add', str(location), ref)
+                    elif new_branch_from is not None:
+                        self.git.git.worktree('add', '-b', ref, str(location), new_branch_from)
+                    else:
+                        self.git.git.worktree('add', '--detach', str(location), ref)
+
+                _invalidate_snapshots()
+
+        worktree = Vcs(self.repo, root=location)
+
+        if ensure_clean and worktree.is_dirty():
+            fatal(f'The worktree {location} has uncommitted changes.',
+                  'Please commit or purge them before proceeding with changes.')
+
+        return worktree
+
+    @_mutating
+    def remove_worktree(self, ref: str):
+        location = self.worktree_location(ref)
+
+        with operation(f'Removing worktree for {ref}') as reporter, \
+                _repository_lock(self.repo):
+            if location.exists():
+                self.git.git.worktree('remove', '--force', str(location))
+            else:
+                reporter(_SKIP)
+
     def find_pull_request(self, branch: str, **filters) -> Optional[PullRequest]:
         pulls = self.github.get_pulls(
             base=self.default_branch,
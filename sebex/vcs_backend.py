@@ -0,0 +1,209 @@
+"""
+Backends answering read-only queries about state of local repositories.
+
+Only queries are pluggable, network operations and changes of repositories are always done with
+the `git` CLI. By default, queries spawn `git` too, but with many repositories and jobs these
+spawns add up, so queries may be answered in-process by libgit2 instead (through `pygit2`, which
+is an optional dependency).
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Set, List, Type
+
+from sebex.context import Context
+from sebex.log import fatal
+from sebex.repo_pool import pool
+
+
+@dataclass
+class Status:
+    head: Optional[str] = None
+    # Paths with changes staged in the index, or present in the working tree only.
+    staged: Set[str] = field(default_factory=set)
+    unstaged: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def parse(cls, output: str) -> 'Status':
+        """
+        Parse output of `git status --porcelain=v2 --branch -z`.
+
+        >>> s = Status.parse('# branch.oid abc\\0# branch.head master\\0'
+        ...                  '1 .M N... 100644 100644 100644 a b mix.exs\\0'
+        ...                  '2 R. N... 100644 100644 100644 a b R100 new name\\0old name\\0'
+        ...                  '? untracked\\0')
+        >>> s.head, sorted(s.staged), sorted(s.unstaged)
+        ('master', ['new name'], ['mix.exs'])
+        """
+
+        status = cls()
+        entries = iter(output.split('\0'))
+        for entry in entries:
+            if entry.startswith('# branch.head '):
+                head = entry[len('# branch.head '):]
+                status.head = None if head == '(detached)' else head
+            elif entry[:2] in ('1 ', '2 ', 'u '):
+                kind = entry[0]
+                fields = {'1': 8, '2': 9, 'u': 10}[kind]
+                parts = entry.split(' ', fields)
+                xy, path = parts[1], parts[-1]
+
+                if kind == '2':
+                    # Renames are followed by original path.
+                    next(entries, None)
+
+                if xy[0] != '.':
+                    status.staged.add(path)
+                if xy[1] != '.':
+                    status.unstaged.add(path)
+
+        return status
+
+
+@dataclass
+class Refs:
+    # Local branches with their upstream branches, if any.
+    heads: Dict[str, Optional[str]] = field(default_factory=dict)
+    tags: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def parse(cls, output: str) -> 'Refs':
+        """
+        Parse output of `git for-each-ref --format=%(refname)%00%(upstream:short)`.
+
+        >>> r = Refs.parse('refs/heads/master\\0origin/master\\nrefs/heads/x\\0\\n'
+        ...                'refs/remotes/origin/master\\0\\nrefs/tags/v1.0.0\\0')
+        >>> r.heads, r.tags
+        ({'master': 'origin/master', 'x': None}, {'v1.0.0'})
+        """
+
+        refs = cls()
+        for line in output.splitlines():
+            ref, _, upstream = line.partition('\0')
+            if ref.startswith('refs/heads/'):
+                refs.heads[ref[len('refs/heads/'):]] = upstream or None
+            elif ref.startswith('refs/tags/'):
+                refs.tags.add(ref[len('refs/tags/'):])
+
+        return refs
+
+
+class VcsBackend(ABC):
+    """Queries of a single repository (or worktree). Untracked files are never considered."""
+
+    def __init__(self, location: Path):
+        self.location = location
+
+    @classmethod
+    @abstractmethod
+    def name(cls) -> str: ...
+
+    @abstractmethod
+    def status(self) -> Status: ...
+
+    @abstractmethod
+    def tracked(self) -> Set[str]:
+        """Paths of files in the index, relative to repository root."""
+        ...
+
+    @abstractmethod
+    def refs(self) -> Refs: ...
+
+
+class GitCliBackend(VcsBackend):
+    @classmethod
+    def name(cls) -> str:
+        return 'git'
+
+    def __init__(self, location: Path):
+        super().__init__(location)
+        self.git = pool.get(location).git
+
+    def status(self) -> Status:
+        # Scanning for untracked files is slow and they are not considered anyway.
+        return Status.parse(self.git.status('--porcelain=v2', '--branch', '-z',
+                                            '--untracked-files=no'))
+
+    def tracked(self) -> Set[str]:
+        return set(self.git.ls_files('-z').split('\0')) - {''}
+
+    def refs(self) -> Refs:
+        return Refs.parse(self.git.for_each_ref('--format=%(refname)%00%(upstream:short)'))
+
+
+class LibGit2Backend(VcsBackend):
+    @classmethod
+    def name(cls) -> str:
+        return 'libgit2'
+
+    def __init__(self, location: Path):
+        super().__init__(location)
+
+        import pygit2
+        self._pygit2 = pygit2
+        # Repository objects must not be shared among threads, and opening one is cheap.
+        self._repo = pygit2.Repository(str(location))
+
+    def status(self) -> Status:
+        pygit2 = self._pygit2
+        repo = self._repo
+
+        status = Status()
+        if repo.head_is_detached:
+            status.head = None
+        elif repo.head_is_unborn:
+            status.head = repo.references['HEAD'].target[len('refs/heads/'):]
+        else:
+            status.head = repo.head.shorthand
+
+        index_flags = (pygit2.GIT_STATUS_INDEX_NEW | pygit2.GIT_STATUS_INDEX_MODIFIED |
+                       pygit2.GIT_STATUS_INDEX_DELETED | pygit2.GIT_STATUS_INDEX_RENAMED |
+                       pygit2.GIT_STATUS_INDEX_TYPECHANGE | pygit2.GIT_STATUS_CONFLICTED)
+        worktree_flags = (pygit2.GIT_STATUS_WT_MODIFIED | pygit2.GIT_STATUS_WT_DELETED |
+                          pygit2.GIT_STATUS_WT_RENAMED | pygit2.GIT_STATUS_WT_TYPECHANGE |
+                          pygit2.GIT_STATUS_CONFLICTED)
+
+        for path, flags in repo.status(untracked_files='no').items():
+            if flags & index_flags:
+                status.staged.add(path)
+            if flags & worktree_flags:
+                status.unstaged.add(path)
+
+        return status
+
+    def tracked(self) -> Set[str]:
+        return {entry.path for entry in self._repo.index}
+
+    def refs(self) -> Refs:
+        repo = self._repo
+
+        refs = Refs()
+        for name in repo.branches.local:
+            upstream = repo.branches.local[name].upstream
+            refs.heads[name] = upstream.shorthand if upstream is not None else None
+
+        for ref in repo.references:
+            if ref.startswith('refs/tags/'):
+                refs.tags.add(ref[len('refs/tags/'):])
+
+        return refs
+
+
+def all_backends() -> List[Type[VcsBackend]]:
+    return [GitCliBackend, LibGit2Backend]
+
+
+def backend_for(location: Path) -> VcsBackend:
+    """Create backend selected for current context."""
+
+    name = Context.current().vcs_backend
+    for backend in all_backends():
+        if backend.name() == name:
+            try:
+                return backend(location)
+            except ImportError:
+                fatal(f'The {name} backend is not installed.',
+                      'Please install Sebex with the libgit2 extra.')
+
+    raise ValueError(f'Unknown VCS backend: {name}')
@@ -0,0 +1,11 @@
+import pytest
+
+from sebex.context import Context
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    context = Context(workspace=str(tmp_path), profile='all', github_access_token='token',
+                      jobs=4, assumeyes=True)
+    with Context.activate(context):
+        yield tmp_path
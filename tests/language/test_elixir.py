@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+from sebex.analysis.model import DependencyUpdate
+from sebex.analysis.version import Version, VersionSpec
+from sebex.checkpoint import Checkpoints
+from sebex.config.manifest import RepositoryHandle, ProjectHandle
+from sebex.edit.span import Span
+from sebex.language import elixir
+from sebex.language.elixir import ElixirLanguageSupport
+from sebex.popen import popen
+from tests.mock_git import init_repository
+
+_MIX_EXS = 'version: "1.0.0"\n{:dep, "~> 1.0"}\n'
+_BRANCH = 'release/v1.1.0'
+
+
+@pytest.fixture
+def mix_calls(monkeypatch):
+    """Replace Mix with a fake one, which rewrites lockfile on `deps.update`."""
+
+    calls = []
+
+    def mix(args, location: Path, **kwargs):
+        calls.append(args)
+        script = 'echo \'%{"dep": "1.1.0"}\' > mix.lock' if args[0] == 'deps.update' else 'true'
+        return popen(['sh', '-c', script], cwd=location, **kwargs)
+
+    monkeypatch.setattr(elixir, 'mix', mix)
+    return calls
+
+
+def _write_release(checkpoints: Checkpoints):
+    dependency = DependencyUpdate(name='dep', from_spec=VersionSpec.parse('~> 1.0'),
+                                  to_spec=VersionSpec.parse('~> 1.1'),
+                                  to_spec_span=Span(2, 8, 2, 16))
+    ElixirLanguageSupport().write_release(ProjectHandle.parse('a'), _BRANCH,
+                                          Version.parse('1.1.0'), Span(1, 10, 1, 17),
+                                          [dependency], checkpoints)
+
+
+def test_write_release_updates_lockfile(workspace, mix_calls):
+    init_repository(workspace / 'a', {'mix.exs': _MIX_EXS, 'mix.lock': '%{"dep": "1.0.0"}\n'})
+    vcs = RepositoryHandle('a').vcs
+    vcs.create_branch(_BRANCH, 'master')
+
+    checkpoints = Checkpoints()
+    _write_release(checkpoints)
+
+    assert mix_calls == [['deps.update', 'dep']]
+    assert vcs.read_file(_BRANCH, Path('mix.exs')) == b'version: "1.1.0"\n{:dep, "~> 1.1"}\n'
+    assert vcs.read_file(_BRANCH, Path('mix.lock')) == b'%{"dep": "1.1.0"}\n'
+    assert checkpoints.reached('mix.exs') and checkpoints.reached('mix.lock')
+
+
+def test_write_release_resumes_at_lockfile(workspace, mix_calls):
+    init_repository(workspace / 'a', {'mix.exs': _MIX_EXS, 'mix.lock': '%{"dep": "1.0.0"}\n'})
+    vcs = RepositoryHandle('a').vcs
+    vcs.create_branch(_BRANCH, 'master')
+
+    _write_release(Checkpoints(['mix.exs']))
+
+    assert mix_calls == [['deps.update', 'dep']]
+    # Files committed by previous run are left as they are.
+    assert vcs.read_file(_BRANCH, Path('mix.exs')) == _MIX_EXS.encode()
+    assert vcs.read_file(_BRANCH, Path('mix.lock')) == b'%{"dep": "1.1.0"}\n'
+
+
+def test_write_release_commits_lockfile_left_by_failed_run(workspace, mix_calls):
+    init_repository(workspace / 'a', {'mix.exs': _MIX_EXS, 'mix.lock': '%{"dep": "1.0.0"}\n'})
+    vcs = RepositoryHandle('a').vcs
+    vcs.create_branch(_BRANCH, 'master')
+
+    # Dependencies were updated, but committing the lockfile failed.
+    worktree = vcs.worktree(_BRANCH)
+    (worktree.location / 'mix.lock').write_text('%{"dep": "1.1.0"}\n')
+
+    checkpoints = Checkpoints(['mix.exs'])
+    _write_release(checkpoints)
+
+    assert vcs.read_file(_BRANCH, Path('mix.lock')) == b'%{"dep": "1.1.0"}\n'
+    assert not worktree.is_dirty()
+    assert checkpoints.reached('mix.lock')
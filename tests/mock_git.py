@@ -0,0 +1,42 @@
+from pathlib import Path
+from typing import Dict
+
+from git import Repo
+
+
+def configure(repo: Repo) -> Repo:
+    with repo.config_writer() as config:
+        config.set_value('user', 'name', 'Sebex')
+        config.set_value('user', 'email', 'sebex@example.com')
+    return repo
+
+
+def init_repository(path: Path, files: Dict[str, str] = None) -> Repo:
+    if files is None:
+        files = {'mix.exs': 'defmodule A do\nend\n'}
+
+    repo = configure(Repo.init(path, initial_branch='master'))
+    commit_files(repo, files, 'initial')
+    return repo
+
+
+def init_remote(path: Path, files: Dict[str, str] = None) -> Repo:
+    """Create bare repository with some initial commit, to be used as remote."""
+    seed = init_repository(path.with_name(path.name + '-seed'), files)
+    bare = Repo.init(path, bare=True, initial_branch='master')
+    seed.git.push(str(path), 'master')
+    return bare
+
+
+def clone(remote: Path, path: Path) -> Repo:
+    return configure(Repo.clone_from(str(remote), path))
+
+
+def commit_files(repo: Repo, files: Dict[str, str], message: str):
+    for name, content in files.items():
+        file = Path(repo.working_tree_dir) / name
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(content)
+
+    repo.git.add('.')
+    repo.git.commit('-m', message)
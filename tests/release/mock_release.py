@@ -0,0 +1,26 @@
+from sebex.analysis.model import Language
+from sebex.analysis.version import Version
+from sebex.config.manifest import ProjectHandle
+from sebex.edit.span import Span
+from sebex.release.state import ProjectState, ReleaseStage, PhaseState, ReleaseState
+
+
+def mock_project(name: str = 'a', stage: ReleaseStage = ReleaseStage.CLEAN,
+                 **kwargs) -> ProjectState:
+    """Create state of project released from 1.0.0 to 1.1.0, other fields may be overridden."""
+
+    return ProjectState(**{
+        'project': ProjectHandle.parse(name),
+        'from_version': Version.parse('1.0.0'),
+        'to_version': Version.parse('1.1.0'),
+        'version_span': Span.ZERO,
+        'language': Language.ELIXIR,
+        'stage': stage,
+        **kwargs,
+    })
+
+
+def mock_release(*phases: PhaseState) -> ReleaseState:
+    release = ReleaseState(sources={}, phases=list(phases))
+    release.name = 'test'
+    return release
@@ -0,0 +1,33 @@
+import pytest
+from git import GitCommandError
+
+from sebex.release.executor import Action
+from sebex.release.executor.close_release_branch import CloseReleaseBranch
+from sebex.release.preflight import preflight
+from sebex.release.state import ReleaseStage, PhaseState
+from sebex.vcs import Vcs
+from tests.mock_git import init_remote, clone
+from tests.release.mock_release import mock_project, mock_release
+
+
+def test_retry_pushes_tag_created_by_failed_attempt(workspace, monkeypatch):
+    remote = init_remote(workspace / 'remote.git')
+    clone(remote.git_dir, workspace / 'a')
+    monkeypatch.setattr(Vcs, 'default_branch', 'master')
+
+    proj = mock_project('a', ReleaseStage.PULL_REQUEST_MERGED)
+    release = mock_release(PhaseState([proj]))
+
+    def fail(*args, **kwargs):
+        raise GitCommandError('push', 1)
+
+    with monkeypatch.context() as m:
+        m.setattr(Vcs, 'push_atomic', fail)
+        with pytest.raises(GitCommandError):
+            CloseReleaseBranch(project=proj).run(release)
+
+    assert proj.project.repo.vcs.tag_exists('v1.1.0')
+    assert preflight([proj]) == []
+
+    assert CloseReleaseBranch(project=proj).run(release) == Action.PROCEED
+    assert 'v1.1.0' in [t.name for t in remote.tags]
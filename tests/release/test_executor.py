@@ -0,0 +1,214 @@
+import threading
+from dataclasses import dataclass
+
+import pytest
+
+from sebex.config.manifest import ProjectHandle
+from sebex.poll import Backoff
+from sebex.release import executor
+from sebex.release.executor import Action, Task
+from sebex.release.state import ReleaseStage, PhaseState, ReleaseState
+from tests.release.mock_release import mock_project, mock_release
+
+
+@pytest.fixture
+def fake_tasks(monkeypatch):
+    """Replace real tasks with ones recording which projects were running at the same time."""
+
+    calls = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(2, timeout=5)
+    breakpoints = set()
+    concurrent = set()
+
+    def get_task_by_stage(stage: ReleaseStage):
+        @dataclass
+        class FakeTask(Task):
+            @classmethod
+            def stage(cls) -> ReleaseStage:
+                return stage
+
+            def run(self, release: ReleaseState) -> Action:
+                name = str(self.project.project)
+                with lock:
+                    calls.append((name, stage))
+
+                if stage == ReleaseStage.BRANCH_OPENED and name in concurrent:
+                    # Both projects must reach this point concurrently, or the barrier breaks.
+                    barrier.wait()
+
+                if stage == ReleaseStage.PULL_REQUEST_MERGED and name in breakpoints:
+                    return Action.BREAKPOINT
+
+                return Action.PROCEED
+
+        return FakeTask
+
+    monkeypatch.setattr(executor, 'get_task_by_stage', get_task_by_stage)
+    return calls, breakpoints, concurrent
+
+
+def test_proceed_runs_phase_concurrently(workspace, fake_tasks):
+    calls, _, concurrent = fake_tasks
+    concurrent.update({'a', 'b'})
+    release = mock_release(PhaseState([mock_project('a'), mock_project('b')]))
+
+    assert executor.proceed(release) == Action.FINISH
+    assert release.is_done()
+    assert len(calls) == 2 * len(list(ReleaseStage.CLEAN))
+
+
+def test_proceed_reports_breakpoints(workspace, fake_tasks):
+    _, breakpoints, _ = fake_tasks
+    breakpoints.add('b')
+    release = mock_release(PhaseState([mock_project('a'), mock_project('b')]))
+
+    assert executor.proceed(release) == Action.BREAKPOINT
+    assert release.phases[0].get_project(ProjectHandle.parse('a')).stage == ReleaseStage.DONE
+    assert release.phases[0].get_project(ProjectHandle.parse('b')).stage == \
+        ReleaseStage.PULL_REQUEST_OPENED
+
+
+def test_proceed_publishes_phase_in_one_batch(workspace, fake_tasks, monkeypatch):
+    calls, _, _ = fake_tasks
+    batches = []
+
+    def publish_batch(release, projects, on_published):
+        batches.append([str(p.project) for p in projects])
+        for proj in projects:
+            on_published(proj)
+
+    monkeypatch.setattr(executor.PublishPackage, 'publish_batch', publish_batch)
+
+    a, b, c = mock_project('a'), mock_project('b'), mock_project('c')
+    a.publish = b.publish = True
+    release = mock_release(PhaseState([a, b, c]))
+
+    assert executor.proceed(release) == Action.FINISH
+    assert release.is_done()
+    assert batches == [['a', 'b']]
+    assert ('a', ReleaseStage.PUBLISHED) not in calls
+    assert ('c', ReleaseStage.PUBLISHED) in calls
+
+
+def test_proceed_does_not_publish_again_after_cleanup_breakpoint(workspace, fake_tasks,
+                                                                 monkeypatch):
+    calls, _, _ = fake_tasks
+    batches = []
+
+    def publish_batch(release, projects, on_published):
+        batches.append([str(p.project) for p in projects])
+        for proj in projects:
+            on_published(proj)
+
+    monkeypatch.setattr(executor.PublishPackage, 'publish_batch', publish_batch)
+
+    a = mock_project('a', ReleaseStage.PUBLISHED)
+    a.publish = True
+    release = mock_release(PhaseState([a]))
+
+    assert executor.proceed(release) == Action.FINISH
+    assert release.is_done()
+    assert batches == []
+    assert calls == [('a', ReleaseStage.DONE)]
+
+
+def test_projects_of_one_repository_run_concurrently(workspace, fake_tasks):
+    _, _, concurrent = fake_tasks
+    concurrent.update({'a:x', 'a:y'})
+    release = mock_release(PhaseState([mock_project('a:x'), mock_project('a:y')]))
+
+    assert executor.proceed(release) == Action.FINISH
+    assert release.is_done()
+
+
+def test_pipelined_proceed_does_not_wait_for_unrelated_projects(workspace, fake_tasks):
+    _, breakpoints, _ = fake_tasks
+    breakpoints.add('a')
+
+    a, x = mock_project('a'), mock_project('x')
+    b, c = mock_project('b'), mock_project('c')
+    b.depends_on = [a.project]
+    c.depends_on = [x.project]
+    release = mock_release(PhaseState([a, x]), PhaseState([b, c]))
+
+    assert [str(t.project.project) for t in executor.plan(release, pipelined=True)] == ['a', 'x']
+    assert executor.proceed(release, pipelined=True) == Action.BREAKPOINT
+
+    assert a.stage == ReleaseStage.PULL_REQUEST_OPENED
+    assert b.stage == ReleaseStage.CLEAN
+    assert x.stage == ReleaseStage.DONE
+    assert c.stage == ReleaseStage.DONE
+
+    breakpoints.clear()
+    assert executor.proceed(release, pipelined=True) == Action.FINISH
+    assert release.is_done()
+
+
+def test_watch_advances_project_once_pull_request_changes(workspace, fake_tasks, monkeypatch):
+    _, breakpoints, _ = fake_tasks
+    breakpoints.add('a')
+    polls = []
+
+    class FakePoller:
+        closed = False
+
+        def __init__(self, pr):
+            pass
+
+        def changed(self) -> bool:
+            polls.append(len(polls))
+            if len(polls) < 3:
+                return False
+
+            breakpoints.clear()
+            return True
+
+    monkeypatch.setattr(executor, 'find_release_pull_request', lambda *args, **kwargs: object())
+    monkeypatch.setattr(executor, 'PullRequestPoller', FakePoller)
+
+    release = mock_release(PhaseState([mock_project('a')]))
+    action = executor.watch(release, backoff=lambda: Backoff(initial=0, jitter=0))
+
+    assert action == Action.FINISH
+    assert release.is_done()
+    assert len(polls) == 3
+    assert ReleaseState.open('test').is_done()
+
+
+def test_watch_stops_at_breakpoint_of_closed_pull_request(workspace, fake_tasks, monkeypatch):
+    _, breakpoints, _ = fake_tasks
+    breakpoints.add('a')
+    polls = []
+
+    class FakePoller:
+        def __init__(self, pr):
+            self.closed = False
+
+        def changed(self) -> bool:
+            polls.append(len(polls))
+            self.closed = True
+            return True
+
+    monkeypatch.setattr(executor, 'find_release_pull_request', lambda *args, **kwargs: object())
+    monkeypatch.setattr(executor, 'PullRequestPoller', FakePoller)
+
+    release = mock_release(PhaseState([mock_project('a')]))
+    action = executor.watch(release, backoff=lambda: Backoff(initial=0, jitter=0))
+
+    assert action == Action.BREAKPOINT
+    assert len(polls) == 1
+
+
+def test_watch_stops_at_breakpoint_without_pull_request(workspace, fake_tasks, monkeypatch):
+    _, breakpoints, _ = fake_tasks
+    breakpoints.add('a')
+
+    monkeypatch.setattr(executor, 'find_release_pull_request', lambda *args, **kwargs: None)
+
+    release = mock_release(PhaseState([mock_project('a')]))
+    action = executor.watch(release, backoff=lambda: Backoff(initial=0, jitter=0))
+
+    assert action == Action.BREAKPOINT
+    assert release.phases[0].get_project(ProjectHandle.parse('a')).stage == \
+        ReleaseStage.PULL_REQUEST_OPENED
@@ -0,0 +1,160 @@
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from sebex.release import git as release_git
+from sebex.release import executor
+from sebex.release.executor import Action
+from sebex.release.git import PullRequestStatus, fetch_release_pull_requests, \
+    fetch_release_pull_request, PullRequestPoller
+from sebex.release.state import ProjectState, ReleaseStage, PhaseState
+from sebex.vcs import Vcs
+from tests.release.mock_release import mock_project, mock_release
+
+
+def _opened(name: str) -> ProjectState:
+    return mock_project(name, ReleaseStage.PULL_REQUEST_OPENED)
+
+
+def _pull_request(number: int, state: str = 'OPEN') -> dict:
+    return {
+        'number': number,
+        'url': f'https://github.com/org/repo/pull/{number}',
+        'state': state,
+        'mergeable': 'MERGEABLE',
+        'latestReviews': {'nodes': []},
+        'commits': {'nodes': [{'commit': {'statusCheckRollup': None}}]},
+    }
+
+
+class _FakeRequester:
+    def __init__(self):
+        self.queries: List[dict] = []
+
+    def requestJsonAndCheck(self, verb: str, url: str, input: dict):
+        assert (verb, url) == ('POST', '/graphql')
+        self.queries.append(input)
+
+        data = {}
+        for key, value in input['variables'].items():
+            if key.startswith('name'):
+                i = key[len('name'):]
+                nodes = [] if value == 'missing' else [_pull_request(int(value[len('r'):]))]
+                data[f'p{i}'] = {'pullRequests': {'nodes': nodes}}
+
+        return {}, {'data': data}
+
+
+class _FakeGithubRepository:
+    def __init__(self, requester: _FakeRequester):
+        self._requester = requester
+
+
+@pytest.fixture
+def requester(workspace, monkeypatch):
+    requester = _FakeRequester()
+    monkeypatch.setattr(Vcs, 'github_full_name', property(lambda self: f'org/{self.repo}'))
+    monkeypatch.setattr(Vcs, 'default_branch', 'master')
+    monkeypatch.setattr(Vcs, 'github', _FakeGithubRepository(requester))
+    return requester
+
+
+def test_fetch_release_pull_requests_in_chunks(requester, monkeypatch):
+    monkeypatch.setattr(release_git, '_GRAPHQL_CHUNK', 2)
+    projects = [_opened(f'r{i}') for i in range(1, 4)] + [_opened('missing')]
+
+    statuses = fetch_release_pull_requests(projects)
+
+    assert len(requester.queries) == 2
+    assert requester.queries[0]['variables']['head0'] == 'release/v1.1.0'
+    assert requester.queries[0]['variables']['base1'] == 'master'
+    assert {str(p): s and s.number for p, s in statuses.items()} == \
+           {'r1': 1, 'r2': 2, 'r3': 3, 'missing': None}
+
+
+def test_fetch_release_pull_requests_leaves_out_failed_repositories(requester, monkeypatch):
+    monkeypatch.setattr(requester, 'requestJsonAndCheck', lambda *args, **kwargs: ({}, {
+        'data': {'p0': None, 'p1': {'pullRequests': {'nodes': [_pull_request(2)]}}},
+        'errors': [{'message': 'Could not resolve to a Repository', 'path': ['p0']}],
+    }))
+    renamed, other = _opened('r1'), _opened('r2')
+
+    statuses = fetch_release_pull_requests([renamed, other])
+    assert {str(p): s.number for p, s in statuses.items()} == {'r2': 2}
+
+    # Single pull requests fall back to REST.
+    rest = []
+    monkeypatch.setattr(release_git, 'find_release_pull_request',
+                        lambda proj, **filters: rest.append(proj) or None)
+    assert fetch_release_pull_request(renamed) is None
+    assert rest == [renamed]
+
+
+def test_prefetched_status_is_used_once(requester):
+    proj = _opened('r1')
+    release = mock_release(PhaseState([proj]))
+
+    executor._prefetch(release, [proj])
+    assert len(requester.queries) == 1
+
+    key = (ReleaseStage.PULL_REQUEST_MERGED, proj.project)
+    assert release.prefetched[key].number == 1
+    release.prefetched[key] = PullRequestStatus(number=1, html_url='', state='open',
+                                                mergeable=True, failed_checks=['ci'])
+
+    assert executor._proceed_project(release, proj, ReleaseStage.PULL_REQUEST_MERGED) == \
+        Action.BREAKPOINT
+    assert len(requester.queries) == 1
+    assert key not in release.prefetched
+
+
+class _ConditionalRequester:
+    """Serves resources by their URL, answering `304 Not Modified` if their etag matches."""
+
+    def __init__(self, resources: dict):
+        self.resources = resources
+
+    def requestJson(self, verb: str, url: str, headers: dict):
+        body = self.resources[url]
+        etag = str(hash(body))
+        if headers.get('If-None-Match') == etag:
+            return 304, {}, ''
+        return 200, {'etag': etag}, body
+
+
+def test_poller_detects_finished_check_runs():
+    pr_url, commit_url = 'https://api/repos/o/r/pulls/1', 'https://api/repos/o/r/commits/abc'
+    requester = _ConditionalRequester({
+        pr_url: '{"head": {"sha": "abc"}}',
+        f'{commit_url}/status': '{"state": "pending", "statuses": []}',
+        f'{commit_url}/check-runs': '{"check_runs": [{"status": "in_progress"}]}',
+    })
+    pr = SimpleNamespace(_requester=requester, url=pr_url, head=SimpleNamespace(sha='abc'),
+                         base=SimpleNamespace(repo=SimpleNamespace(url='https://api/repos/o/r')))
+
+    poller = PullRequestPoller(pr)
+    assert not poller.changed()
+
+    requester.resources[f'{commit_url}/check-runs'] = \
+        '{"check_runs": [{"status": "completed", "conclusion": "success"}]}'
+    assert poller.changed()
+    assert not poller.changed()
+
+
+def test_poller_notices_pull_request_closed_without_merging():
+    pr_url = 'https://api/repos/o/r/pulls/1'
+    requester = _ConditionalRequester({
+        pr_url: '{"head": {"sha": "abc"}, "state": "open", "merged": false}',
+        'https://api/repos/o/r/commits/abc/status': '{}',
+        'https://api/repos/o/r/commits/abc/check-runs': '{}',
+    })
+    pr = SimpleNamespace(_requester=requester, url=pr_url, head=SimpleNamespace(sha='abc'),
+                         base=SimpleNamespace(repo=SimpleNamespace(url='https://api/repos/o/r')))
+
+    poller = PullRequestPoller(pr)
+    assert not poller.closed
+
+    requester.resources[pr_url] = '{"head": {"sha": "abc"}, "state": "closed", "merged": false}'
+    assert poller.changed()
+    assert poller.closed
@@ -0,0 +1,67 @@
+import pytest
+
+from sebex.config.manifest import ProjectHandle
+from sebex.release.lock import ReleaseLocks
+from sebex.release.state import ReleaseState
+
+
+def _pending(name: str) -> ReleaseState:
+    rel = ReleaseState(sources={}, phases=[])
+    rel.name = name
+    rel.save()
+    return rel
+
+
+def test_disjoint_releases_do_not_conflict(workspace):
+    _pending('core')
+
+    with ReleaseLocks.exclusive() as locks:
+        locks.acquire('core', [ProjectHandle.parse('a'), ProjectHandle.parse('b')])
+
+    with ReleaseLocks.exclusive() as locks:
+        assert locks.conflicts('plugin', [ProjectHandle.parse('c')]) == {}
+        locks.acquire('plugin', [ProjectHandle.parse('c')])
+
+    locks = ReleaseLocks.open()
+    assert locks.owner(ProjectHandle.parse('b')) == 'core'
+    assert locks.owner(ProjectHandle.parse('c')) == 'plugin'
+
+
+def test_overlapping_releases_conflict(workspace):
+    _pending('core')
+
+    with ReleaseLocks.exclusive() as locks:
+        locks.acquire('core', [ProjectHandle.parse('a'), ProjectHandle.parse('b')])
+
+    with ReleaseLocks.exclusive() as locks:
+        projects = [ProjectHandle.parse('b'), ProjectHandle.parse('c')]
+        assert locks.conflicts('hotfix', projects) == {ProjectHandle.parse('b'): 'core'}
+
+        with pytest.raises(ValueError):
+            locks.acquire('hotfix', projects)
+
+
+def test_stale_locks_are_ignored(workspace):
+    with ReleaseLocks.exclusive() as locks:
+        locks.acquire('gone', [ProjectHandle.parse('a')])
+
+    with ReleaseLocks.exclusive() as locks:
+        assert locks.conflicts('new', [ProjectHandle.parse('a')]) == {}
+        locks.acquire('new', [ProjectHandle.parse('a')])
+        assert locks.releases() == ['new']
+
+
+def test_released_locks_are_freed(workspace):
+    rel = _pending('core')
+
+    with ReleaseLocks.exclusive() as locks:
+        locks.acquire('core', [ProjectHandle.parse('a')])
+
+    assert ReleaseState.pending() == ['core']
+
+    with ReleaseLocks.exclusive() as locks:
+        rel.delete()
+        locks.release('core')
+
+    assert ReleaseState.pending() == []
+    assert ReleaseLocks.open().owner(ProjectHandle.parse('a')) is None
@@ -0,0 +1,33 @@
+from sebex.config.manifest import ProjectHandle
+from sebex.release.preflight import preflight, describe_blockers
+from sebex.release.state import ReleaseStage
+from tests.mock_git import init_repository
+from tests.release.mock_release import mock_project
+
+
+def test_preflight_reports_all_blockers(workspace):
+    init_repository(workspace / 'dirty')
+    worktree = ProjectHandle.parse('dirty').repo.vcs.worktree('release/v1.1.0',
+                                                              new_branch_from='master')
+    (worktree.location / 'mix.exs').write_text('changed')
+
+    # Changes in the main clone do not matter.
+    init_repository(workspace / 'fine')
+    (workspace / 'fine' / 'mix.exs').write_text('changed')
+
+    tagged = init_repository(workspace / 'tagged')
+    tagged.create_tag('v1.1.0')
+
+    blockers = preflight([
+        mock_project('dirty', ReleaseStage.BRANCH_OPENED),
+        mock_project('tagged', ReleaseStage.BRANCH_OPENED),
+        mock_project('fine', ReleaseStage.BRANCH_OPENED),
+        mock_project('missing', ReleaseStage.CLEAN),
+    ])
+
+    assert {(str(b.project), b.check) for b in blockers} == {
+        ('dirty', 'clean'),
+        ('tagged', 'tag'),
+        ('missing', 'clone'),
+    }
+    assert 'Tag v1.1.0 already exists.' in describe_blockers(blockers)
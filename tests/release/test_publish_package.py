@@ -0,0 +1,52 @@
+from sebex.analysis.version import Version
+from sebex.release.executor import publish_package
+from sebex.release.executor.publish_package import PublishPackage
+from sebex.release.state import ProjectState, ReleaseStage
+from tests.release.mock_release import mock_project
+
+
+class _FakeSupport:
+    def __init__(self, available_after: int):
+        self.checks = 0
+        self.available_after = available_after
+
+    def is_available(self, package: str, version: Version) -> bool:
+        self.checks += 1
+        return self.checks > self.available_after
+
+
+def _project(package=None) -> ProjectState:
+    return mock_project(stage=ReleaseStage.CREATE_GITHUB_RELEASE, publish=True, package=package)
+
+
+def _patch(monkeypatch, support: _FakeSupport):
+    sleeps = []
+    monkeypatch.setattr(publish_package, 'language_support_for', lambda _: support)
+    monkeypatch.setattr(publish_package.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def test_waits_until_package_is_available(workspace, monkeypatch):
+    support = _FakeSupport(available_after=2)
+    sleeps = _patch(monkeypatch, support)
+
+    assert PublishPackage.wait_until_available(_project('a'))
+    assert support.checks == 3
+    assert len(sleeps) == 2
+    assert sleeps[0] < sleeps[1]
+
+
+def test_gives_up_after_timeout(workspace, monkeypatch):
+    support = _FakeSupport(available_after=1)
+    _patch(monkeypatch, support)
+    monkeypatch.setattr(publish_package, '_PROPAGATION_TIMEOUT', 0)
+
+    assert not PublishPackage.wait_until_available(_project('a'))
+
+
+def test_does_not_wait_for_unknown_package(workspace, monkeypatch):
+    support = _FakeSupport(available_after=1)
+    _patch(monkeypatch, support)
+
+    assert PublishPackage.wait_until_available(_project())
+    assert support.checks == 0
@@ -0,0 +1,80 @@
+from typing import Optional
+
+from sebex.analysis.model import Language
+from sebex.config.manifest import ProjectHandle
+from sebex.language import language_support_for
+from sebex.language.elixir import ElixirLanguageSupport
+from sebex.release.simulation import Simulation, Latency, SimulationReport, Event
+from sebex.release.state import ProjectState, ReleaseStage, PhaseState, ReleaseState
+from sebex.vcs import Vcs
+from tests.release.mock_release import mock_project, mock_release
+
+
+def _published(name: str) -> ProjectState:
+    return mock_project(name, publish=True, package=name)
+
+
+def _simulation() -> Simulation:
+    latencies = {op: Latency(1) for op in ['git', 'fetch', 'push', 'github', 'write', 'dry-run',
+                                         'publish', 'propagation']}
+    latencies['ci'] = Latency(100)
+    return Simulation(latencies, speedup=10000, seed=0)
+
+
+def test_simulation_runs_release_to_the_end(workspace):
+    release = mock_release(PhaseState([_published('a'), _published('b')]),
+                           PhaseState([_published('c')]))
+
+    report = _simulation().run(release)
+
+    assert {e.project for e in report.events} == {'a', 'b', 'c'}
+    assert {e.operation for e in report.events if e.project == 'c'} >= \
+        {'ci', 'publish', 'propagation'}
+    assert report.max_parallelism == 2
+    # Phases run one after another, each waiting for CI.
+    assert report.duration >= 200
+
+    # Original release is left untouched.
+    assert all(p.stage == ReleaseStage.CLEAN for phase in release.phases for p in phase)
+    assert not ReleaseState.exists('test')
+
+
+def test_max_parallelism():
+    report = SimulationReport([
+        Event('a', 'git', 0, 10),
+        Event('b', 'git', 5, 15),
+        Event('c', 'git', 10, 20),
+        Event('a', 'git', 12, 13),
+    ])
+
+    assert report.max_parallelism == 3
+    assert report.duration == 20
+
+
+def test_pipelined_simulation_overlaps_phases(workspace):
+    a, b, c = _published('a'), _published('b'), _published('c')
+    c.depends_on = [a.project]
+    release = mock_release(PhaseState([a, b]), PhaseState([c]))
+
+    report = _simulation().run(release, pipelined=True)
+
+    assert {e.project for e in report.events} == {'a', 'b', 'c'}
+    assert report.max_parallelism == 2
+
+
+def test_fakes_are_only_used_while_simulation_runs(workspace):
+    release = mock_release(PhaseState([_published('a')]))
+    repo = release.phases[0].get_project(ProjectHandle.parse('a')).project.repo
+
+    class Probe(Simulation):
+        def spend(self, operation: str, duration: Optional[float] = None):
+            support = language_support_for(Language.ELIXIR)
+            seen.add((type(repo.vcs).__name__, type(support).__name__))
+            super().spend(operation, duration)
+
+    seen = set()
+    Probe(speedup=100000, seed=0).run(release)
+
+    assert seen == {('SimulatedVcs', '_SimulatedLanguageSupport')}
+    assert isinstance(repo.vcs, Vcs)
+    assert isinstance(language_support_for(Language.ELIXIR), ElixirLanguageSupport)
@@ -4,10 +4,11 @@ from sebex.analysis.graph import DependentsGraph
 from sebex.analysis.model import Language, DependencyUpdate
 from sebex.analysis.version import Version, VersionSpec
 from sebex.checksum import Checksum
-from sebex.config.manifest import ProjectHandle
+from sebex.config.manifest import ProjectHandle, Manifest, RepositoryManifest, ProjectManifest
 from sebex.edit.span import Span
 from sebex.release.state import ReleaseState, PhaseState, ProjectState, ReleaseStage
 from tests.analysis.mock_database import chain_db, triangle_db
+from tests.release.mock_release import mock_project, mock_release
 
 
 def test_petname_deterministic():
@@ -716,3 +717,61 @@ def test_serialization():
         ],
     )
     assert ReleaseState(data=rel._make_data()) == rel
+
+
+def test_plan_records_dependencies(workspace):
+    with Manifest.open().transaction() as manifest:
+        for name in ('a', 'b', 'c'):
+            manifest.upsert_repository(RepositoryManifest(
+                name=name, remote_url=f'git@github.com:org/{name}.git', force_publish=False,
+                projects=[ProjectManifest()]))
+
+    db = triangle_db(specs=lambda _pkg, _dep, _vs: VersionSpec.parse('~> 1.0.0'))
+    graph = DependentsGraph.build(db)
+    rel = ReleaseState.plan({ProjectHandle.parse('c'): Version.parse('1.1.0')}, db, graph)
+
+    def depends_on(name):
+        return rel.get_project(ProjectHandle.parse(name)).depends_on
+
+    assert depends_on('c') == []
+    assert depends_on('b') == [ProjectHandle.parse('c')]
+    assert depends_on('a') == [ProjectHandle.parse('b'), ProjectHandle.parse('c')]
+
+    restored = ReleaseState(data=rel._make_data())
+    assert restored.dependencies_of(restored.get_project(ProjectHandle.parse('a'))) == \
+        [restored.get_project(ProjectHandle.parse('b')),
+         restored.get_project(ProjectHandle.parse('c'))]
+
+
+def test_dependencies_fall_back_to_phase_order():
+    a, b, c = (mock_project(name, depends_on=None) for name in 'abc')
+    rel = mock_release(PhaseState([a, b]), PhaseState([c]))
+
+    assert rel.dependencies_of(a) == []
+    assert rel.dependencies_of(c) == [a, b]
+
+
+def test_checkpoints_are_persisted():
+    project = mock_project(checkpoints=['mix.exs'])
+
+    assert ProjectState.from_raw(project.to_raw()).checkpoints == ['mix.exs']
+
+    project.checkpoints = []
+    assert 'checkpoints' not in project.to_raw()
+
+
+def test_legacy_release_is_moved_among_named_releases(workspace):
+    legacy = ReleaseState(sources={}, phases=[PhaseState([mock_project()])])
+    legacy._name = 'release'
+    legacy.save()
+    assert (workspace / '.sebex' / 'release.yaml').exists()
+
+    rel = ReleaseState.open_legacy()
+    assert rel.name == rel.default_name()
+    assert list(rel.projects()) == [ProjectHandle.parse('a')]
+
+    rel.save()
+    ReleaseState.delete_legacy()
+
+    assert ReleaseState.open_legacy() is None
+    assert ReleaseState.pending() == [rel.name]
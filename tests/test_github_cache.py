@@ -0,0 +1,53 @@
+from sebex.github_cache import ResponseCache, cached
+
+
+class FakeGithub:
+    def __init__(self):
+        self.body = '{"state": "open"}'
+        self.etag = '"1"'
+        self.requests = []
+
+    def request_json(self, verb, url, parameters=None, headers=None, input=None, cnx=None):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get('If-None-Match') == self.etag:
+            return 304, {'etag': self.etag, 'x-ratelimit-remaining': '5000'}, ''
+        return 200, {'etag': self.etag, 'link': '<next>'}, self.body
+
+
+def test_unchanged_responses_are_revalidated_and_served_from_cache(tmp_path):
+    server = FakeGithub()
+    request_json = cached(server.request_json, ResponseCache(tmp_path, 'token'))
+
+    assert request_json('GET', '/repos/a/b/pulls/1') == \
+           (200, {'etag': '"1"', 'link': '<next>'}, '{"state": "open"}')
+    assert 'If-None-Match' not in server.requests[-1]
+
+    status, headers, body = request_json('GET', '/repos/a/b/pulls/1')
+    assert server.requests[-1]['If-None-Match'] == '"1"'
+    assert (status, body) == (200, '{"state": "open"}')
+    assert headers['link'] == '<next>'
+    assert headers['x-ratelimit-remaining'] == '5000'
+
+    server.body, server.etag = '{"state": "closed"}', '"2"'
+    assert request_json('GET', '/repos/a/b/pulls/1')[2] == '{"state": "closed"}'
+
+
+def test_cache_is_not_shared_between_tokens_and_methods(tmp_path):
+    server = FakeGithub()
+    request_json = cached(server.request_json, ResponseCache(tmp_path, 'token'))
+    request_json('GET', '/repos/a/b')
+
+    other = cached(server.request_json, ResponseCache(tmp_path, 'other'))
+    other('GET', '/repos/a/b')
+    assert 'If-None-Match' not in server.requests[-1]
+
+    request_json('POST', '/repos/a/b', input={})
+    assert 'If-None-Match' not in server.requests[-1]
+
+
+def test_own_conditional_requests_pass_through(tmp_path):
+    server = FakeGithub()
+    request_json = cached(server.request_json, ResponseCache(tmp_path, 'token'))
+    request_json('GET', '/repos/a/b')
+
+    assert request_json('GET', '/repos/a/b', headers={'If-None-Match': '"1"'})[0] == 304
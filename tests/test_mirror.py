@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from git import Repo
+
+from sebex import mirror
+from sebex.config.manifest import RepositoryHandle
+from tests.mock_git import init_remote, configure, commit_files
+
+
+def test_clones_borrow_objects_from_mirror_and_fetch_through_it(workspace):
+    remote = init_remote(workspace / 'remote.git', {'mix.exs': 'a\n'})
+    url = str(remote.git_dir)
+    location = mirror.mirror_location(workspace / 'mirrors', url)
+
+    mirror.update(location, url, RepositoryHandle('a'))
+    local = configure(Repo.clone_from(url, workspace / 'a', **mirror.clone_options(location, url)))
+
+    alternates = Path(local.git_dir) / 'objects' / 'info' / 'alternates'
+    assert alternates.read_text().strip() == str(location / 'objects')
+
+    vcs = RepositoryHandle('a').vcs
+    assert vcs.git.git.ls_remote('--get-url', 'origin') == str(location)
+    assert vcs.git.git.remote('get-url', '--push', 'origin') == url
+
+    seed = Repo(workspace / 'remote.git-seed')
+    commit_files(seed, {'mix.exs': 'b\n'}, 'second')
+    seed.git.push(url, 'master')
+
+    # Fetching updates the mirror first.
+    assert not vcs.is_synced()
+    vcs.pull()
+    assert Repo(location).commit('master').summary == 'second'
+    assert (workspace / 'a' / 'mix.exs').read_text() == 'b\n'
+
+    # Pushes bypass the mirror.
+    commit_files(local, {'mix.exs': 'c\n'}, 'third')
+    vcs.push(branch='master')
+    assert remote.commit('master').summary == 'third'
+    assert Repo(location).commit('master').summary == 'second'
+
+    vcs.use_mirror(None)
+    assert vcs.git.git.ls_remote('--get-url', 'origin') == url
+
+
+def test_foreign_url_rewrites_are_not_mirrors(workspace, monkeypatch):
+    remote = init_remote(workspace / 'remote.git')
+    url = str(remote.git_dir)
+    local = configure(Repo.clone_from(url, workspace / 'a'))
+    with local.config_writer() as config:
+        config.set_value(f'url "{workspace / "elsewhere.git"}"', 'insteadOf', url)
+
+    updates = []
+    monkeypatch.setattr(mirror, 'update', lambda *args: updates.append(args))
+
+    vcs = RepositoryHandle('a').vcs
+    vcs._update_mirror()
+    vcs.use_mirror(None)
+
+    assert updates == []
+    assert local.git.config('--get', f'url.{workspace / "elsewhere.git"}.insteadOf') == url
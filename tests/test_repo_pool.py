@@ -0,0 +1,70 @@
+import threading
+
+from sebex.repo_pool import RepoPool
+from tests.mock_git import init_repository
+
+
+def test_least_recently_used_repositories_are_closed(tmp_path):
+    for name in 'abc':
+        init_repository(tmp_path / name)
+
+    pool = RepoPool(capacity=2)
+
+    with pool.open(tmp_path / 'a') as a:
+        a.git.get_object_header('HEAD')
+        assert a.git.cat_file_header is not None
+
+    assert pool.get(tmp_path / 'a') is pool.get(tmp_path / 'a')
+    pool.get(tmp_path / 'b')
+    pool.get(tmp_path / 'c')
+
+    assert len(pool) == 2
+    # Persistent processes of evicted repository are gone.
+    assert a.git.cat_file_header is None
+    with pool.open(tmp_path / 'a') as reopened:
+        assert reopened is not a
+
+
+def test_open_repositories_are_not_evicted(tmp_path):
+    for name in 'abc':
+        init_repository(tmp_path / name)
+
+    pool = RepoPool(capacity=1)
+
+    with pool.open(tmp_path / 'a') as a:
+        a.git.get_object_header('HEAD')
+        pool.get(tmp_path / 'b')
+        pool.get(tmp_path / 'c')
+        assert a.git.cat_file_header is not None
+
+    pool.get(tmp_path / 'b')
+    assert len(pool) == 1
+
+
+def test_shared_repositories_never_spawn_persistent_processes(tmp_path):
+    init_repository(tmp_path / 'a')
+    pool = RepoPool(environment=lambda: {'GIT_TEST_VARIABLE': 'x'})
+
+    repo = pool.get(tmp_path / 'a')
+    repo.head.commit.tree.blobs
+    assert repo.git.cat_file_header is None and repo.git.cat_file_all is None
+    assert repo.git.environment() == {'GIT_TEST_VARIABLE': 'x'}
+
+
+def test_open_serializes_access_to_repository(tmp_path):
+    init_repository(tmp_path / 'a')
+    pool = RepoPool()
+
+    other_done = threading.Event()
+
+    def other():
+        with pool.open(tmp_path / 'a'):
+            other_done.set()
+
+    with pool.open(tmp_path / 'a'):
+        thread = threading.Thread(target=other)
+        thread.start()
+        assert not other_done.wait(0.1)
+
+    thread.join()
+    assert other_done.is_set()
@@ -0,0 +1,22 @@
+from sebex import ssh
+from sebex.context import Context
+
+
+def test_connection_shares_master_per_host(workspace):
+    with ssh.connection('git@github.com:membraneframework/sebex.git') as env:
+        assert 'ControlMaster=auto' in env['GIT_SSH_COMMAND']
+        assert 'ControlPath=' in env['GIT_SSH_COMMAND']
+
+    with ssh.connection(str(workspace / 'remote.git')) as env:
+        assert env == {}
+
+
+def test_connections_per_host_are_limited(workspace, monkeypatch):
+    monkeypatch.setattr(ssh, '_host_semaphores', {})
+    Context.current().connections_per_host = 1
+
+    semaphore = ssh._host_semaphore('example.com')
+    with ssh.connection('git@example.com:a/b.git'):
+        assert not semaphore.acquire(blocking=False)
+
+    assert semaphore.acquire(blocking=False)
@@ -0,0 +1,272 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from git import Repo
+
+from sebex.config.manifest import RepositoryHandle, ProjectHandle
+from sebex.config.workspace import WorkspaceConfig
+from sebex.analysis.model import Language
+from sebex.language import analysis_directories, detect_language
+from sebex.log import FatalError
+from sebex.popen import popen
+from tests.mock_git import init_remote, clone, configure, init_repository, commit_files
+
+
+def test_push_atomic_deletes_branches_and_pushes_tags(workspace):
+    remote = init_remote(workspace / 'remote.git')
+    local = clone(remote.git_dir, workspace / 'a')
+    local.git.push('origin', 'master:release/v1.0.0')
+    local.create_tag('v1.0.0')
+
+    vcs = RepositoryHandle('a').vcs
+    vcs.push_atomic(delete_branches=['release/v1.0.0'], tags=['v1.0.0'])
+
+    assert [h.name for h in remote.heads] == ['master']
+    assert [t.name for t in remote.tags] == ['v1.0.0']
+
+    # Branch is already gone, so only the tag is pushed.
+    assert not vcs.tag_exists('v1.0.1')
+    local.create_tag('v1.0.1')
+    vcs.push_atomic(delete_branches=['release/v1.0.0'], tags=['v1.0.1'])
+
+    assert [t.name for t in remote.tags] == ['v1.0.0', 'v1.0.1']
+    # Pushing drops cached snapshot, like any other change.
+    assert vcs.tag_exists('v1.0.1')
+
+
+def test_worktree_leaves_main_clone_intact(workspace):
+    remote = init_remote(workspace / 'remote.git')
+    local = clone(remote.git_dir, workspace / 'a')
+
+    vcs = RepositoryHandle('a').vcs
+    worktree = vcs.worktree('release/v1.0.0', new_branch_from='master')
+    assert worktree.location == workspace / '.sebex' / 'worktrees' / 'a' / 'release-v1.0.0'
+
+    configure(worktree.git)
+    (worktree.location / 'mix.exs').write_text('changed')
+    worktree.commit('bump', [worktree.location / 'mix.exs'])
+
+    assert local.active_branch.name == 'master'
+    assert not vcs.is_dirty()
+    assert local.heads['release/v1.0.0'].commit.summary == 'bump'
+
+    # Existing worktree is reused.
+    assert vcs.worktree('release/v1.0.0').git.head.commit.summary == 'bump'
+
+    vcs.remove_worktree('release/v1.0.0')
+    assert not worktree.location.exists()
+
+
+def test_commit_files_does_not_touch_working_tree(workspace):
+    local = init_repository(workspace / 'a', {'mix.exs': 'old\n', 'README.md': 'readme\n'})
+    vcs = RepositoryHandle('a').vcs
+    vcs.create_branch('release/v1.0.0', 'master')
+
+    assert vcs.read_file('release/v1.0.0', Path('mix.exs')) == b'old\n'
+    assert vcs.read_file('release/v1.0.0', Path('missing')) is None
+
+    commit = vcs.commit_files('release/v1.0.0', 'bump', {
+        Path('mix.exs'): b'new\n',
+        Path('sub/mix.exs'): b'sub\n',
+    })
+
+    assert local.heads['release/v1.0.0'].commit.hexsha == commit
+    assert local.heads['release/v1.0.0'].commit.parents == (local.heads['master'].commit,)
+    assert vcs.read_file('release/v1.0.0', Path('mix.exs')) == b'new\n'
+    assert vcs.read_file('release/v1.0.0', Path('sub/mix.exs')) == b'sub\n'
+    assert vcs.read_file('release/v1.0.0', Path('README.md')) == b'readme\n'
+
+    assert (workspace / 'a' / 'mix.exs').read_text() == 'old\n'
+    assert not vcs.is_dirty()
+
+
+def test_commit_files_refuses_checked_out_branch(workspace):
+    init_repository(workspace / 'a')
+    vcs = RepositoryHandle('a').vcs
+
+    with pytest.raises(FatalError):
+        vcs.commit_files('master', 'bump', {Path('mix.exs'): b'new\n'})
+
+
+def test_queries_are_answered_from_snapshot(workspace):
+    init_repository(workspace / 'a', {'mix.exs': 'a\n', 'mix.lock': 'b\n'})
+    lock = workspace / 'a' / 'mix.lock'
+    vcs = RepositoryHandle('a').vcs
+
+    assert vcs.active_branch == 'master'
+    assert not vcs.is_dirty()
+    assert vcs.is_tracked(lock)
+    assert not vcs.is_tracked(workspace / 'a' / 'other')
+
+    lock.write_text('changed\n')
+    # Changes made behind Sebex's back are not noticed...
+    assert not vcs.is_dirty()
+    # ...until any external command is run.
+    popen(['true'])
+    assert vcs.is_dirty()
+    assert vcs.is_changed(lock)
+
+    vcs.commit('update lockfile', [lock])
+    assert not vcs.is_dirty()
+
+    vcs.create_branch('release/v1.0.0', 'master')
+    vcs.tag('v1.0.0')
+    assert vcs.branch_exists('release/v1.0.0')
+    assert vcs.tracking_branch('release/v1.0.0') is None
+    assert vcs.tag_exists('v1.0.0')
+
+
+def test_snapshot_taken_while_command_runs_is_refreshed(workspace):
+    init_repository(workspace / 'a', {'mix.exs': 'a\n', 'mix.lock': 'b\n'})
+    vcs = RepositoryHandle('a').vcs
+    location = workspace / 'a'
+
+    script = 'touch started; while [ ! -e go ]; do sleep 0.01; done; echo c > mix.lock'
+    command = threading.Thread(target=popen, args=(['sh', '-c', script],),
+                               kwargs={'cwd': location})
+    command.start()
+    while not (location / 'started').exists():
+        time.sleep(0.01)
+
+    (location / 'started').unlink()
+    assert not vcs.is_dirty()
+
+    (location / 'go').touch()
+    command.join()
+    (location / 'go').unlink()
+    assert vcs.is_changed(location / 'mix.lock')
+
+
+def test_partial_shallow_clone_supports_release_operations(workspace):
+    remote = init_remote(workspace / 'remote.git', {'mix.exs': 'a\n', 'README.md': 'b\n'})
+    remote.git.config('uploadpack.allowFilter', 'true')
+
+    with WorkspaceConfig.open().transaction() as config:
+        config.clone_filter = 'blob:none'
+        config.depth = 1
+
+    # Partial clones are supported only by proper transports, not by local path copying.
+    local = configure(Repo.clone_from(f'file://{remote.git_dir}', workspace / 'a',
+                                      **config.clone_options()))
+    assert local.git.config('remote.origin.partialclonefilter') == 'blob:none'
+
+    seed = Repo(workspace / 'remote.git-seed')
+    commit_files(seed, {'mix.exs': 'c\n'}, 'second')
+    seed.create_tag('v1.0.0')
+    seed.git.push(str(remote.git_dir), 'master', 'v1.0.0')
+
+    vcs = RepositoryHandle('a').vcs
+    vcs.fetch()
+    assert vcs.tag_exists('v1.0.0')
+    assert vcs.is_tracked(workspace / 'a' / 'README.md')
+    assert vcs.read_file('origin/master', Path('mix.exs')) == b'c\n'
+
+    vcs.create_branch('release/v1.1.0', 'origin/master')
+    vcs.commit_files('release/v1.1.0', 'bump', {Path('mix.exs'): b'd\n'})
+    assert vcs.read_file('release/v1.1.0', Path('README.md')) == b'b\n'
+
+
+def test_sparse_checkout_contains_analysis_files_only(workspace):
+    remote = init_remote(workspace / 'remote.git', {
+        'mix.exs': 'a\n',
+        'lib/a.ex': 'b\n',
+        'plugins/x/mix.exs': 'c\n',
+        'plugins/x/lib/x.ex': 'd\n',
+    })
+    remote.git.config('uploadpack.allowFilter', 'true')
+
+    with WorkspaceConfig.open().transaction() as config:
+        config.sparse = True
+
+    configure(Repo.clone_from(f'file://{remote.git_dir}', workspace / 'a',
+                              **config.clone_options()))
+
+    vcs = RepositoryHandle('a').vcs
+    assert vcs.is_sparse()
+    assert vcs.sparse_directories() == set()
+
+    vcs.set_sparse_checkout(analysis_directories(ProjectHandle.parse('a:plugins/x')))
+    assert vcs.sparse_directories() == {'plugins/x'}
+    assert (workspace / 'a' / 'mix.exs').exists()
+    assert (workspace / 'a' / 'plugins' / 'x' / 'mix.exs').exists()
+    assert not (workspace / 'a' / 'lib').exists()
+
+    vcs.disable_sparse_checkout()
+    assert not vcs.is_sparse()
+    assert vcs.sparse_directories() is None
+    assert (workspace / 'a' / 'lib' / 'a.ex').exists()
+
+
+def test_is_synced_compares_remote_tips(workspace):
+    remote = init_remote(workspace / 'remote.git')
+    clone(remote.git_dir, workspace / 'a')
+
+    vcs = RepositoryHandle('a').vcs
+    assert vcs.is_synced()
+
+    seed = Repo(workspace / 'remote.git-seed')
+    seed.create_tag('v1.0.0')
+    seed.git.push(str(remote.git_dir), 'v1.0.0')
+    assert not vcs.is_synced()
+
+    vcs.fetch()
+    assert vcs.is_synced(pull=False)
+
+    commit_files(seed, {'mix.exs': 'b\n'}, 'second')
+    seed.git.push(str(remote.git_dir), 'master')
+    vcs.fetch()
+    # Fetched, but not merged yet.
+    assert vcs.is_synced(pull=False)
+    assert not vcs.is_synced(pull=True)
+
+    vcs.pull()
+    assert vcs.is_synced()
+
+    # Stale remote-tracking branches and local tags are never pruned by fetching.
+    seed.git.push(str(remote.git_dir), 'master:feature')
+    vcs.fetch()
+    seed.git.push(str(remote.git_dir), '--delete', 'feature')
+    vcs.git.create_tag('v2.0.0')
+    assert vcs.is_synced()
+
+
+def test_read_file_sees_fetched_revisions(workspace):
+    remote = init_remote(workspace / 'remote.git', {'mix.exs': 'a\n'})
+    clone(remote.git_dir, workspace / 'a')
+
+    vcs = RepositoryHandle('a').vcs
+    assert vcs.read_file('origin/master', Path('mix.exs')) == b'a\n'
+
+    seed = Repo(workspace / 'remote.git-seed')
+    commit_files(seed, {'mix.exs': 'b\n', 'sub/mix.exs': 'c\n'}, 'second')
+    seed.git.push(str(remote.git_dir), 'master')
+    vcs.fetch()
+
+    assert vcs.read_file('origin/master', Path('mix.exs')) == b'b\n'
+    assert vcs.read_file('master', Path('mix.exs')) == b'a\n'
+    assert vcs.file_exists('origin/master', Path('sub/mix.exs'))
+    assert not vcs.file_exists('origin/master', Path('sub'))
+    assert not vcs.file_exists('master', Path('sub/mix.exs'))
+    assert detect_language(ProjectHandle.parse('a:sub'), 'origin/master') == Language.ELIXIR
+    assert (workspace / 'a' / 'mix.exs').read_text() == 'a\n'
+
+
+def test_maintain_packs_loose_objects(workspace):
+    local = init_repository(workspace / 'a', {'mix.exs': 'a\n'})
+    for i in range(5):
+        commit_files(local, {'mix.exs': f'{i}\n'}, f'commit {i}')
+
+    vcs = RepositoryHandle('a').vcs
+    assert int(dict(line.split(': ') for line in
+                    local.git.count_objects('-v').splitlines())['count']) > 0
+
+    vcs.maintain()
+
+    counts = dict(line.split(': ') for line in local.git.count_objects('-v').splitlines())
+    assert counts['count'] == '0'
+    assert vcs.disk_usage() > 0
+    assert local.git.config('core.untrackedCache') == 'true'
+    # Commit graph is written incrementally, as a chain of files.
+    assert (Path(local.git_dir) / 'objects' / 'info' / 'commit-graphs').exists()
@@ -0,0 +1,46 @@
+import pytest
+
+from sebex.context import Context
+from sebex.config.manifest import RepositoryHandle
+from sebex.vcs_backend import GitCliBackend, LibGit2Backend
+from tests.mock_git import init_remote, clone
+
+
+@pytest.fixture
+def repository(workspace):
+    remote = init_remote(workspace / 'remote.git', {'mix.exs': 'a\n', 'mix.lock': 'b\n'})
+    local = clone(remote.git_dir, workspace / 'a')
+    local.create_head('release/v1.0.0')
+    local.create_tag('v1.0.0')
+
+    (workspace / 'a' / 'mix.exs').write_text('changed\n')
+    (workspace / 'a' / 'new').write_text('new\n')
+    local.git.add('new')
+    (workspace / 'a' / 'untracked').write_text('untracked\n')
+
+    return workspace / 'a'
+
+
+def test_backends_agree(repository):
+    pytest.importorskip('pygit2')
+
+    cli, libgit2 = GitCliBackend(repository), LibGit2Backend(repository)
+
+    assert cli.status() == libgit2.status()
+    assert cli.status().staged == {'new'}
+    assert cli.status().unstaged == {'mix.exs'}
+    assert cli.tracked() == libgit2.tracked() == {'mix.exs', 'mix.lock', 'new'}
+    assert cli.refs() == libgit2.refs()
+    assert cli.refs().heads == {'master': 'origin/master', 'release/v1.0.0': None}
+
+
+def test_vcs_queries_use_selected_backend(repository):
+    pytest.importorskip('pygit2')
+    Context.current().vcs_backend = 'libgit2'
+
+    vcs = RepositoryHandle('a').vcs
+    assert isinstance(vcs._snapshot.backend, LibGit2Backend)
+    assert vcs.active_branch == 'master'
+    assert vcs.is_dirty()
+    assert vcs.is_changed(repository / 'mix.exs')
+    assert vcs.tag_exists('v1.0.0')